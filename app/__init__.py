@@ -6,9 +6,24 @@ from flask_jwt_extended import (
 )
 from flask_bcrypt import Bcrypt
 from flasgger import Swagger
+from werkzeug.exceptions import ServiceUnavailable
 from app.routes.user_routes import user_routes
 from app.routes.game_routes import game_routes
-from app.repositories.user_repository import UserRepository
+from app.routes.score_routes import score_routes
+from app.routes.play_routes import play_routes
+from app.repositories.user_repository import (
+    UserRepository,
+    user_cache,
+    token_version_cache,
+)
+from app.repositories.game_repository import count_cache, facet_cache, counter_buffer
+from app.repositories.play_repository import play_stats_buffer, session_buffer
+from app.tools.password_hasher import PasswordHasher
+from app.tools.json_provider import OrjsonProvider
+from app.tools.compression import Compression
+from app.tools.response import Response
+from app.dtos.response import ResponseDTO
+from app.commands import index_cli, game_cli, bench_cli
 
 template = {
     "swagger": "2.0",
@@ -70,20 +85,49 @@ swagger_config = {
 
 db = MongoEngine()
 bcrypt = Bcrypt()
+password_hasher = PasswordHasher(bcrypt)
 jwt = JWTManager()
+compression = Compression()
 swagger = Swagger(template=template,config=swagger_config)
 
 
 def create_app(config):
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     CORS(app)
     app.config.from_object(config)
     db.init_app(app)
     bcrypt.init_app(app)
+    password_hasher.init_app(app)
     swagger.init_app(app)
     jwt.init_app(app)
+    compression.init_app(app)
+    count_cache.init_app(app)
+    facet_cache.init_app(app)
+    user_cache.init_app(app)
+    token_version_cache.init_app(app)
+    counter_buffer.init_app(app)
+    play_stats_buffer.init_app(app)
+    session_buffer.init_app(app)
     app.register_blueprint(user_routes, url_prefix="/users")
     app.register_blueprint(game_routes, url_prefix="/games")
+    app.register_blueprint(score_routes, url_prefix="/games")
+    app.register_blueprint(play_routes, url_prefix="/games")
+    app.cli.add_command(index_cli)
+    app.cli.add_command(game_cli)
+    app.cli.add_command(bench_cli)
+
+    @jwt.token_in_blocklist_loader
+    def is_token_revoked(jwt_header, jwt_payload):
+        # Tokens from before claims carried a version are treated as stale too.
+        version = UserRepository().get_token_version(jwt_payload["sub"])
+        return version is None or jwt_payload.get("token_version") != version
+
+    @app.errorhandler(ServiceUnavailable)
+    def service_unavailable(e):
+        # Back-pressure raised through handle_response, in the usual envelope.
+        headers = [header for header in e.get_headers() if header[0] == "Retry-After"]
+        return ResponseDTO.convert(Response.fail(e.description)), 503, headers
 
     @app.after_request
     def add_cors_headers(response):
@@ -0,0 +1,501 @@
+import random
+import re
+import time
+import uuid
+import click
+import json
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from flask import current_app
+from flask.cli import AppGroup
+from mongoengine import Q
+from app.models.game import Game, GameChangeLog
+from app.models.user import User
+from app.models.game_vote import GameVote, VoteDirection
+from app.models.comment import Comment
+from app.models.user_score import UserScore, ScoreBucket, ScorePeriod
+from app.models.play_session import PlaySession, PlayStats
+from app.repositories.game_repository import GameRepository, counter_buffer
+from app.repositories.game_vote_repository import GameVoteRepository
+from app.repositories.comment_repository import CommentRepository
+from app.repositories.score_repository import ScoreRepository, BOARD_ORDER
+from app.repositories.play_repository import PlayRepository
+from app.repositories.user_repository import UserRepository
+from app.services.game_service import GameService
+from app.dtos.game import GamePagingDTO, GameDetailOutputDTO
+from app.tools.serializer import serializer
+from app.tools.search import tokenize
+
+INDEXED_MODELS = [
+    Game, User, GameVote, Comment, UserScore, ScoreBucket, PlaySession, PlayStats
+]
+
+index_cli = AppGroup("indexes", help="Create and check MongoDB indexes.")
+game_cli = AppGroup("games", help="Game data maintenance.")
+bench_cli = AppGroup("bench", help="Measure query latency against the configured database.")
+
+
+def _index_keys(model):
+    return {
+        ("text",) if ("_fts", "text") in index["key"] else tuple(index["key"])
+        for index in model._get_collection().index_information().values()
+    }
+
+
+def _declared_index_keys(model):
+    return [
+        ("text",)
+        if any(direction == "text" for _, direction in spec["fields"])
+        else tuple(spec["fields"])
+        for spec in model._meta["index_specs"]
+    ]
+
+
+def _report_latency(name, samples):
+    samples = sorted(samples)
+
+    def percentile(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+    click.echo(
+        f"{name}: n={len(samples)} p50={percentile(0.5):.2f}ms "
+        f"p95={percentile(0.95):.2f}ms p99={percentile(0.99):.2f}ms "
+        f"max={samples[-1] * 1000:.2f}ms"
+    )
+
+
+def _plan_stages(plan):
+    plan = plan.get("queryPlan", plan)
+    stages = [plan["stage"]]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for input_stage in plan.get("inputStages", []):
+        stages += _plan_stages(input_stage)
+    return stages
+
+
+def _hot_queries():
+    """The queries the repositories run on every request, with sample values."""
+    game_repo = GameRepository()
+    sample_game = Game.objects.only("id", "tags", "game_engine", "publisher_id").first()
+    sample_user = User.objects.only("email", "nickname").first()
+    tag = sample_game.tags[0] if sample_game and sample_game.tags else "tag"
+    engine = sample_game.game_engine if sample_game else "Unity"
+    publisher_id = sample_game.publisher_id if sample_game else ObjectId()
+    game_id = sample_game.id if sample_game else ObjectId()
+    email = sample_user.email if sample_user else "user@example.com"
+    nickname = sample_user.nickname if sample_user else "nickname"
+    listing_order = ("-created_at", "-id")
+    return [
+        (
+            "game list",
+            Game.objects(game_repo._build_filter(None, None, None)).order_by(*listing_order),
+        ),
+        (
+            "game list by tag",
+            Game.objects(game_repo._build_filter([tag], None, None)).order_by(*listing_order),
+        ),
+        (
+            "game list by engine",
+            Game.objects(game_repo._build_filter(None, engine, None)).order_by(*listing_order),
+        ),
+        ("game list hot", Game.objects.order_by("-hot_score", "-id")),
+        ("game list top", Game.objects.order_by("-top_score", "-id")),
+        ("games by publisher", Game.objects(publisher_id=publisher_id)),
+        ("game search prefix", Game.objects(search_prefixes__all=[tag[:2].lower()])),
+        ("game vote by user", GameVote.objects(game_id=game_id, user_id=publisher_id)),
+        (
+            "game voters",
+            GameVote.objects(game_id=game_id, direction=VoteDirection.UP).order_by(
+                "-created_at", "-id"
+            ),
+        ),
+        (
+            "game comments",
+            Comment.objects(game_id=game_id, parent_id=None).order_by("-created_at", "-id"),
+        ),
+        (
+            "comment subtree",
+            Comment.objects(game_id=game_id, path=re.compile(f"^{game_id}/")).order_by("path"),
+        ),
+        (
+            "latest replies per thread",
+            Comment.objects(game_id=game_id, root_id__in=[game_id]).order_by(
+                "-created_at", "-id"
+            ),
+        ),
+        (
+            "leaderboard top",
+            UserScore.objects(
+                game_id=game_id, period=ScorePeriod.ALL, window_start=None
+            ).order_by(*BOARD_ORDER),
+        ),
+        (
+            "leaderboard entry",
+            UserScore.objects(
+                game_id=game_id, period=ScorePeriod.ALL, window_start=None, user_id=publisher_id
+            ),
+        ),
+        (
+            "leaderboard buckets above",
+            ScoreBucket.objects(
+                game_id=game_id, period=ScorePeriod.ALL, window_start=None, level=0, bucket__gt=0
+            ),
+        ),
+        ("play stats", PlayStats.objects(game_id=game_id).order_by("-day")),
+        ("user by email", User.objects(email=email)),
+        (
+            "user by email or nickname",
+            User.objects(Q(email=nickname) | Q(nickname=nickname)),
+        ),
+    ]
+
+
+@index_cli.command("ensure")
+def ensure_indexes():
+    """Create every index declared on the models."""
+    for model in INDEXED_MODELS:
+        model.ensure_indexes()
+        click.echo(f"{model._get_collection_name()}: {len(_index_keys(model))} indexes")
+
+
+@index_cli.command("verify")
+def verify_indexes():
+    """Report missing indexes and the winning plan of each hot query."""
+    failed = False
+    for model in INDEXED_MODELS:
+        existing = _index_keys(model)
+        for keys in _declared_index_keys(model):
+            if keys not in existing:
+                failed = True
+                click.echo(f"missing index on {model._get_collection_name()}: {keys}")
+    for name, queryset in _hot_queries():
+        stages = _plan_stages(queryset.limit(10).explain()["queryPlanner"]["winningPlan"])
+        if "COLLSCAN" in stages:
+            failed = True
+        click.echo(f"{name}: {' <- '.join(stages)}")
+    if failed:
+        raise click.ClickException("Some hot queries are not index backed")
+
+
+@game_cli.command("reindex-search")
+def reindex_search():
+    """Recompute the search prefixes of every game."""
+    click.echo(f"{GameRepository().reindex_search()} games updated")
+
+
+@game_cli.command("migrate-votes")
+def migrate_votes():
+    """Move embedded game voter lists into the game_vote collection."""
+    GameVote.ensure_indexes()
+    games, votes = GameVoteRepository().migrate_embedded_votes()
+    GameRepository().refresh_rankings()
+    click.echo(f"{votes} votes migrated from {games} games")
+
+
+@game_cli.command("reconcile-votes")
+def reconcile_votes():
+    """Recount game_vote into each game's upvote/downvote counters and rerank them."""
+    counter_buffer.flush()
+    drifted = GameVoteRepository().reconcile_counters()
+    if drifted:
+        GameRepository().refresh_rankings(drifted)
+    click.echo(f"{len(drifted)} games corrected")
+
+
+@game_cli.command("migrate-comments")
+def migrate_comments():
+    """Move embedded game comments into the comment collection."""
+    Comment.ensure_indexes()
+    games, comments = CommentRepository().migrate_embedded_comments()
+    click.echo(f"{comments} comments migrated from {games} games")
+
+
+@game_cli.command("rebuild-comment-threads")
+def rebuild_comment_threads():
+    """Recompute comment paths and reply counts of every game from parent ids."""
+    Comment.ensure_indexes()
+    comment_repo = CommentRepository()
+    games = Comment.objects.distinct("game_id")
+    for game_id in games:
+        comment_repo.rebuild_threads(game_id)
+    click.echo(f"{len(games)} games updated")
+
+
+@game_cli.command("migrate-scores")
+def migrate_scores():
+    """Move embedded game scores into the all-time leaderboards."""
+    UserScore.ensure_indexes()
+    ScoreBucket.ensure_indexes()
+    games, scores = ScoreRepository().migrate_embedded_scores()
+    click.echo(f"{scores} scores migrated from {games} games")
+
+
+@game_cli.command("rebuild-score-buckets")
+def rebuild_score_buckets():
+    """Recount the leaderboard score buckets that ranks are computed from."""
+    ScoreBucket.ensure_indexes()
+    click.echo(f"{ScoreRepository().rebuild_buckets()} buckets written")
+
+
+@game_cli.command("refresh-rankings")
+def refresh_rankings():
+    """Recompute hot and top scores of every game from its counters."""
+    click.echo(f"{GameRepository().refresh_rankings()} games updated")
+
+
+@bench_cli.command("search")
+@click.option("--runs", default=200, help="Queries per search mode.")
+@click.option("--page-size", default=10)
+def bench_search(runs, page_size):
+    """Latency percentiles of full-text and prefix search on existing titles."""
+    words = [
+        word
+        for game in Game.objects.only("title").limit(200)
+        for word in tokenize(game.title)
+        if len(word) >= 3
+    ]
+    if not words:
+        raise click.ClickException("No game titles to build queries from")
+    game_repo = GameRepository()
+    for name, prefix, make_query in (
+        ("full text", False, lambda word: word),
+        ("prefix", True, lambda word: word[:3]),
+    ):
+        samples = []
+        for _ in range(runs):
+            query = make_query(random.choice(words))
+            started_at = time.perf_counter()
+            game_repo.search(query, None, page_size, prefix)
+            samples.append(time.perf_counter() - started_at)
+        _report_latency(name, samples)
+
+
+@bench_cli.command("votes")
+@click.option("--users", default=20, help="Concurrent voters.")
+@click.option("--clicks", default=2000, help="Total vote clicks.")
+@click.option("--threads", default=16)
+def bench_votes(users, clicks, threads):
+    """Hammer one scratch game with random votes and check the counters match."""
+    run_id = uuid.uuid4().hex[:8]
+    voters = [
+        User(
+            email=f"bench-{run_id}-{index}@example.com",
+            nickname=f"bench-{run_id}-{index}",
+            password="-",
+        ).save()
+        for index in range(users)
+    ]
+    game = Game(publisher_id=voters[0].id, game_engine="bench", title=f"bench-{run_id}").save()
+    game_service = GameService(
+        GameRepository(),
+        UserRepository(),
+        GameVoteRepository(),
+        CommentRepository(),
+        ScoreRepository(),
+        PlayRepository(),
+    )
+
+    def click_vote(_):
+        voter = random.choice(voters)
+        vote = random.choice((game_service.upvote_game, game_service.downvote_game))
+        started_at = time.perf_counter()
+        res = vote(game.id, voter)
+        if not res.result:
+            raise click.ClickException(res.message)
+        return time.perf_counter() - started_at
+
+    try:
+        with ThreadPoolExecutor(threads) as executor:
+            samples = list(executor.map(click_vote, range(clicks)))
+        _report_latency("vote", samples)
+        game.reload("upvote", "downvote")
+        ups = GameVote.objects(game_id=game.id, direction=VoteDirection.UP).count()
+        downs = GameVote.objects(game_id=game.id, direction=VoteDirection.DOWN).count()
+        click.echo(f"counters {game.upvote}/{game.downvote}, votes {ups}/{downs}")
+        if (game.upvote, game.downvote) != (ups, downs):
+            raise click.ClickException("Vote counters drifted from the vote records")
+    finally:
+        GameVote.objects(game_id=game.id).delete()
+        game.delete()
+        User.objects(id__in=[voter.id for voter in voters]).delete()
+
+
+LEADERBOARD_DISTRIBUTIONS = {
+    "uniform": lambda: random.randint(0, 1_000_000),
+    # A 0-999 point game with most players near 500: one wide bucket would
+    # hold the whole board, and exact-score ties are common.
+    "clustered": lambda: min(999, max(0, int(random.gauss(500, 100)))),
+}
+
+
+@bench_cli.command("leaderboard")
+@click.option("--scores", default=1_000_000, help="Scores to seed on each scratch game.")
+@click.option("--runs", default=200, help="Queries per lookup kind.")
+@click.option("--batch-size", default=10_000)
+@click.option(
+    "--distribution",
+    "distributions",
+    type=click.Choice(list(LEADERBOARD_DISTRIBUTIONS)),
+    multiple=True,
+    default=list(LEADERBOARD_DISTRIBUTIONS),
+    help="Score distributions to seed, one scratch game each.",
+)
+def bench_leaderboard(scores, runs, batch_size, distributions):
+    """Latency of top-100 and rank lookups on seeded all-time leaderboards.
+
+    Ranks are timed separately for random entries and for the bottom of the
+    board, where counting every entry above would be slowest, on a uniform
+    board and on one whose scores are clustered around a single value.
+    """
+    UserScore.ensure_indexes()
+    ScoreBucket.ensure_indexes()
+    for distribution in distributions:
+        click.echo(f"-- {distribution} scores")
+        _bench_board(LEADERBOARD_DISTRIBUTIONS[distribution], scores, runs, batch_size)
+
+
+def _bench_board(draw_score, scores, runs, batch_size):
+    game_id = ObjectId()
+    collection = UserScore._get_collection()
+    started_at = time.perf_counter()
+    achieved_at = datetime.now(timezone.utc)
+    for offset in range(0, scores, batch_size):
+        collection.insert_many(
+            [
+                {
+                    "game_id": game_id,
+                    "period": ScorePeriod.ALL.value,
+                    "window_start": None,
+                    "user_id": ObjectId(),
+                    "score": draw_score(),
+                    "achieved_at": achieved_at,
+                }
+                for _ in range(min(batch_size, scores - offset))
+            ],
+            ordered=False,
+        )
+    click.echo(f"seeded {scores} scores in {time.perf_counter() - started_at:.1f}s")
+    score_repo = ScoreRepository()
+    try:
+        started_at = time.perf_counter()
+        buckets = score_repo.rebuild_buckets(game_id)
+        click.echo(f"built {buckets} score buckets in {time.perf_counter() - started_at:.1f}s")
+        samples = []
+        for _ in range(runs):
+            started_at = time.perf_counter()
+            score_repo.get_top(game_id, ScorePeriod.ALL, 100)
+            samples.append(time.perf_counter() - started_at)
+        _report_latency("top 100", samples)
+        user_ids = [
+            son["user_id"]
+            for son in collection.aggregate(
+                [{"$match": {"game_id": game_id}}, {"$sample": {"size": runs}}]
+            )
+        ]
+        bottom_user_ids = [
+            son["user_id"]
+            for son in collection.find({"game_id": game_id}, {"user_id": 1})
+            .sort("score", 1)
+            .limit(runs)
+        ]
+        for user_id in user_ids[:5] + bottom_user_ids[:5]:
+            entry = score_repo.get_entry(game_id, ScorePeriod.ALL, user_id)
+            counted = collection.count_documents(
+                {"game_id": game_id, **score_repo._ahead_match(entry)}
+            ) + 1
+            if score_repo.get_rank(entry) != counted:
+                raise click.ClickException("Bucketed rank differs from the counted rank")
+
+        def rank_with_neighbours(entry):
+            score_repo.get_rank(entry)
+            score_repo.get_neighbours(entry, 5)
+
+        for name, lookup, sampled in (
+            ("rank", score_repo.get_rank, user_ids),
+            ("rank (bottom of board)", score_repo.get_rank, bottom_user_ids),
+            ("rank + 5 neighbours", rank_with_neighbours, user_ids),
+        ):
+            samples = []
+            for user_id in sampled:
+                started_at = time.perf_counter()
+                lookup(score_repo.get_entry(game_id, ScorePeriod.ALL, user_id))
+                samples.append(time.perf_counter() - started_at)
+            _report_latency(name, samples)
+    finally:
+        collection.delete_many({"game_id": game_id})
+        ScoreBucket.objects(game_id=game_id).delete()
+
+
+@bench_cli.command("serializers")
+@click.option("--games", default=100, help="Games per listing page.")
+@click.option("--comments", default=20, help="Comments on the detail page.")
+@click.option("--runs", default=200)
+def bench_serializers(games, comments, runs):
+    """Per-response cost of marshmallow dumps against the compiled serializers."""
+    now = datetime.now(timezone.utc)
+    game_list = [
+        Game(
+            id=ObjectId(),
+            publisher_id=ObjectId(),
+            game_engine="Unity",
+            title=f"bench game {index}",
+            description="lorem ipsum " * 20,
+            tags=["action", "pixel", "multiplayer"],
+            upvote=index,
+            downvote=index // 3,
+            played_count=index * 7,
+            created_at=now,
+            change_logs=[GameChangeLog(major=1, minor=minor, patch=0, log="fixes") for minor in range(3)],
+        )
+        for index in range(games)
+    ]
+    listing = {"game_list": game_list, "next_cursor": "abc", "prev_cursor": None, "total": games}
+    raw_listing = dict(listing, game_list=[game.to_mongo().to_dict() for game in game_list])
+    detail = game_list[0]
+    detail.comments = {
+        "comments": [
+            Comment(
+                id=ObjectId(),
+                game_id=detail.id,
+                path=str(index),
+                content="nice game " * 5,
+                user_id=ObjectId(),
+                nickname=f"player{index}",
+                created_at=now,
+                updated_at=now,
+            )
+            for index in range(comments)
+        ],
+        "next_cursor": None,
+        "prev_cursor": None,
+    }
+    provider = current_app.json
+
+    def marshmallow_path(schema, payload):
+        return json.dumps(schema().dump(payload), default=provider.default, sort_keys=True)
+
+    def compiled_path(schema, payload):
+        return provider.dumps(serializer(schema)(payload))
+
+    with current_app.test_request_context():
+        for name, schema, payload in (
+            ("listing", GamePagingDTO, listing),
+            ("listing from raw BSON", GamePagingDTO, raw_listing),
+            ("detail", GameDetailOutputDTO, detail),
+        ):
+            # Unset fields are absent from raw BSON rather than None, and
+            # marshmallow would look for id instead of _id, so only document
+            # payloads are checked for identical output.
+            if payload is not raw_listing and json.loads(
+                marshmallow_path(schema, payload)
+            ) != json.loads(compiled_path(schema, payload)):
+                raise click.ClickException(f"{name}: compiled output differs from marshmallow")
+            for path_name, path in (("marshmallow", marshmallow_path), ("compiled", compiled_path)):
+                samples = []
+                for _ in range(runs):
+                    started_at = time.perf_counter()
+                    path(schema, payload)
+                    samples.append(time.perf_counter() - started_at)
+                _report_latency(f"{name} {path_name}", samples)
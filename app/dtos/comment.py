@@ -1,5 +1,4 @@
 from marshmallow import Schema, fields, EXCLUDE
-from app.dtos.voter import VoterOutputDTO
 
 
 class CommentInputDto(Schema):
@@ -11,16 +10,38 @@ class CommentInputDto(Schema):
 
 
 class CommentOutputDto(Schema):
+    id = fields.String()
     content = fields.String()
     sub_thread_count = fields.Number()
+    reply_count = fields.Int()
     parent_id = fields.String()
+    root_id = fields.String(allow_none=True)
+    depth = fields.Int()
     user_id = fields.String()
     nickname = fields.String()
     email = fields.String()
     upvote = fields.Number()
     downvote = fields.Number()
-    upvote_list = fields.List(fields.Nested(VoterOutputDTO))
-    downvote_list = fields.List(fields.Nested(VoterOutputDTO))
     created_at = fields.DateTime()
     updated_at = fields.DateTime()
     removed_at = fields.DateTime()
+    replies = fields.List(fields.Nested(lambda: CommentOutputDto(exclude=("replies",))))
+
+
+class CommentPagingDTO(Schema):
+    comments = fields.List(fields.Nested(CommentOutputDto))
+    next_cursor = fields.String(allow_none=True)
+    prev_cursor = fields.String(allow_none=True)
+
+
+class CommentThreadDTO(Schema):
+    comment = fields.Nested(CommentOutputDto)
+    comments = fields.List(fields.Nested(CommentOutputDto))
+    next_cursor = fields.String(allow_none=True)
+
+
+class CommentCounterOutputDTO(Schema):
+    id = fields.String()
+    upvote = fields.Int()
+    downvote = fields.Int()
+    vote = fields.String(allow_none=True)
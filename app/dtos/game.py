@@ -1,8 +1,7 @@
 from marshmallow import Schema, fields, validate, post_dump, EXCLUDE
 from app.models.game import GamePlatform
-from app.tools.custom_fields import GridFSField
-from app.dtos.voter import VoterOutputDTO
-from app.dtos.comment import CommentOutputDto
+from app.tools.custom_fields import GridFSUrlField
+from app.dtos.comment import CommentPagingDTO
 
 class GameInputDTO(Schema):
     publisher_id = fields.String(required=True)
@@ -52,7 +51,7 @@ class GameThumbnailOutputDTO(Schema):
     downvote = fields.Int()
     played_count = fields.Int()
     created_at = fields.DateTime()
-    thumbnail = GridFSField()
+    thumbnail = GridFSUrlField("game_routes.get_game_thumbnail")
 
 
 class GameDetailOutputDTO(Schema):
@@ -66,18 +65,38 @@ class GameDetailOutputDTO(Schema):
     game_engine = fields.String()
     upvote = fields.Number()
     downvote = fields.Number()
-    upvote_list = fields.List(fields.Nested(VoterOutputDTO))
-    downvote_list = fields.List(fields.Nested(VoterOutputDTO))
     played_count = fields.Number()
     created_at = fields.DateTime()
     embedded_link = fields.String()
     ref_link = fields.String()
-    game_content = GridFSField()
+    game_content = GridFSUrlField("game_routes.get_game_content")
     change_logs = fields.List(fields.Nested(GameChangeLogOutputDTO))
-    comments = fields.List(fields.Nested(CommentOutputDto))
+    comment_count = fields.Int()
+    comments = fields.Nested(CommentPagingDTO)
+
+
+class GameCounterOutputDTO(Schema):
+    id = fields.String()
+    upvote = fields.Int()
+    downvote = fields.Int()
+    played_count = fields.Int()
+    vote = fields.String(allow_none=True)
 
 
 class GamePagingDTO(Schema):
     game_list = fields.List(fields.Nested(GameThumbnailOutputDTO))
     current_page = fields.Int()
     max_page = fields.Int()
+    next_cursor = fields.String(allow_none=True)
+    prev_cursor = fields.String(allow_none=True)
+    total = fields.Int(allow_none=True)
+
+
+class FacetBucketDTO(Schema):
+    value = fields.String()
+    count = fields.Int()
+
+
+class GameFacetOutputDTO(Schema):
+    tags = fields.List(fields.Nested(FacetBucketDTO))
+    game_engine = fields.List(fields.Nested(FacetBucketDTO))
@@ -0,0 +1,20 @@
+from marshmallow import Schema, fields
+
+
+class PlaySessionOutputDTO(Schema):
+    session_id = fields.String()
+    played_count = fields.Int()
+    duration = fields.Int()
+
+
+class PlaySummaryOutputDTO(Schema):
+    day = fields.Date()
+    sessions = fields.Int()
+    completed = fields.Int()
+    avg_session_seconds = fields.Float()
+    unique_players = fields.Int()
+
+
+class PlayStatsOutputDTO(Schema):
+    days = fields.List(fields.Nested(PlaySummaryOutputDTO))
+    total = fields.Nested(PlaySummaryOutputDTO)
@@ -1,5 +1,6 @@
 from typing import TypeVar, Type
 from app.tools.response import Response
+from app.tools.serializer import serializer
 from marshmallow import Schema, fields
 
 T = TypeVar("T", bound=Schema)
@@ -14,7 +15,7 @@ class ResponseDTO:
     @classmethod
     def convert(cls, response: Response, schema: Type[T] = None):
         if schema:
-            mapped = schema().dump(response.response)
+            mapped = serializer(schema)(response.response)
             return ResponseDTO(response.message, response.result, mapped).to_dict()
         else:
             return ResponseDTO(response.message, response.result, None).to_dict()
@@ -0,0 +1,50 @@
+from marshmallow import Schema, fields, validate, EXCLUDE
+
+
+class ScoreInputDTO(Schema):
+    score = fields.Int(required=True, validate=validate.Range(min=0))
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+class ScoreBatchItemInputDTO(Schema):
+    game_id = fields.String(required=True, validate=validate.Regexp(r"^[0-9a-f]{24}$"))
+    user_id = fields.String(required=False, validate=validate.Regexp(r"^[0-9a-f]{24}$"))
+    score = fields.Int(required=True, validate=validate.Range(min=0))
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+class ScoreBatchResultOutputDTO(Schema):
+    index = fields.Int()
+    status = fields.String()
+    message = fields.String(allow_none=True)
+    errors = fields.Dict(allow_none=True)
+
+
+class ScoreBatchOutputDTO(Schema):
+    accepted = fields.Int()
+    rejected = fields.Int()
+    results = fields.List(fields.Nested(ScoreBatchResultOutputDTO))
+
+
+class RankedScoreOutputDTO(Schema):
+    rank = fields.Int()
+    user_id = fields.String()
+    user_nickname = fields.String()
+    score = fields.Int()
+    achieved_at = fields.DateTime()
+
+
+class LeaderboardOutputDTO(Schema):
+    period = fields.String()
+    scores = fields.List(fields.Nested(RankedScoreOutputDTO))
+
+
+class ScoreRankOutputDTO(Schema):
+    period = fields.String()
+    entry = fields.Nested(RankedScoreOutputDTO)
+    above = fields.List(fields.Nested(RankedScoreOutputDTO))
+    below = fields.List(fields.Nested(RankedScoreOutputDTO))
@@ -9,6 +9,9 @@ class JwtTokenInputDTO(Schema):
     id = fields.String()
     email = fields.String()
     name = fields.String()
+    nickname = fields.String()
+    roles = fields.List(fields.String())
+    token_version = fields.Integer()
     exp_date = fields.DateTime()
     class Meta:
         unknown = EXCLUDE
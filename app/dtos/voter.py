@@ -5,3 +5,9 @@ class VoterOutputDTO(Schema):
     user_id = fields.String()
     user_nickname = fields.String()
     created_at = fields.DateTime()
+
+
+class VoterPagingDTO(Schema):
+    voters = fields.List(fields.Nested(VoterOutputDTO))
+    next_cursor = fields.String(allow_none=True)
+    prev_cursor = fields.String(allow_none=True)
@@ -1,20 +1,36 @@
 import mongoengine as me
-from bson import ObjectId
 from datetime import datetime, timezone
 from app.models.voter import Voter
 
 
-class Comment(me.EmbeddedDocument):
+class Comment(me.Document):
+    game_id = me.ObjectIdField(required=True)
+    parent_id = me.ObjectIdField(default=None)
+    root_id = me.ObjectIdField(default=None)
+    # Ids from the thread root down to this comment, "/"-joined, so a
+    # subtree is one indexed prefix range.
+    path = me.StringField()
+    depth = me.IntField(min_value=0, default=0)
     content = me.StringField()
     upvote = me.IntField(min_value=0, default=0)
     upvote_list = me.EmbeddedDocumentListField(Voter, default=[])
     downvote = me.IntField(min_value=0, default=0)
     downvote_list = me.EmbeddedDocumentListField(Voter, default=[])
-    sub_thread_count = me.IntField(0, default=0)
-    parent_id = me.ReferenceField("Comment")
+    reply_count = me.IntField(min_value=0, default=0)
+    sub_thread_count = me.IntField(min_value=0, default=0)
     user_id = me.ObjectIdField(required=True)
     nickname = me.StringField()
     email = me.StringField()
-    created_at = me.DateTimeField(default=datetime.now(timezone.utc))
-    updated_at = me.DateTimeField(default=datetime.now(timezone.utc))
+    created_at = me.DateTimeField(default=lambda: datetime.now(timezone.utc))
+    updated_at = me.DateTimeField(default=lambda: datetime.now(timezone.utc))
     removed_at = me.DateTimeField(required=False, default=None)
+    meta = {
+        "collection": "comment",
+        "indexes": [
+            ("game_id", "parent_id", "-created_at", "-id"),
+            ("game_id", "path"),
+            ("game_id", "root_id", "-created_at", "-id"),
+            ("game_id", "user_id"),
+        ],
+    }
+
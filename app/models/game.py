@@ -1,9 +1,7 @@
 import mongoengine as me
 from enum import Enum
 from datetime import datetime, timezone
-from app.models.voter import Voter
-from app.models.comment import Comment
-from app.models.user_score import UserScore
+from app.tools.search import search_prefixes
 
 
 class GamePlatform(Enum):
@@ -26,21 +24,48 @@ class Game(me.Document):
     description = me.StringField()
     tags = me.ListField(me.StringField())
     upvote = me.IntField(min_value=0, default=0)
-    upvote_list = me.EmbeddedDocumentListField(Voter, default=[])
     downvote = me.IntField(min_value=0, default=0)
-    downvote_list = me.EmbeddedDocumentListField(Voter, default=[])
     played_count = me.IntField(0, default=0)
-    comments = me.EmbeddedDocumentListField(Comment, default=[])
-    created_at = me.DateTimeField(default=datetime.now(timezone.utc))
+    comment_count = me.IntField(min_value=0, default=0)
+    created_at = me.DateTimeField(default=lambda: datetime.now(timezone.utc))
     is_hidden = me.BooleanField(default=False)
-    scores = me.EmbeddedDocumentListField(UserScore, default=[])
     removed_at = me.DateTimeField(required=False, default=None)
     embedded_link = me.StringField(required=False, default=None)
     ref_link = me.StringField(required=False, default=None)
     thumbnail = me.FileField(collection_name="image")
     game_content = me.FileField(collection_name="game_content")
     change_logs = me.EmbeddedDocumentListField(GameChangeLog, default=[])
-    meta = {"collection": "game"}
+    search_prefixes = me.ListField(me.StringField(), default=[])
+    hot_score = me.FloatField(default=0)
+    top_score = me.FloatField(default=0)
+    # Bumped by every change to what the detail and listing endpoints
+    # return; weak ETags are built from it.
+    revision = me.IntField(min_value=0, default=0)
+    meta = {
+        "collection": "game",
+        # Games stored before the vote, comment and score migrations still
+        # carry upvote_list, downvote_list, comments and scores until `flask
+        # games migrate-votes`, `migrate-comments` and `migrate-scores`
+        # remove them.
+        "strict": False,
+        "indexes": [
+            ("-created_at", "-id"),
+            ("tags", "-created_at", "-id"),
+            ("game_engine", "-created_at", "-id"),
+            "publisher_id",
+            ("-hot_score", "-id"),
+            ("-top_score", "-id"),
+            ("search_prefixes", "-created_at", "-id"),
+            {
+                "fields": ["$title", "$tags", "$description"],
+                "default_language": "english",
+                "weights": {"title": 10, "tags": 5, "description": 1},
+            },
+        ],
+    }
+
+    def clean(self):
+        self.search_prefixes = search_prefixes([self.title, *self.tags])
 
     def add_change_log(self, major, minor, patch, log: str):
         for change_log in self.change_logs:
@@ -56,13 +81,3 @@ class Game(me.Document):
         self.change_logs.append(GameChangeLog(major=major, minor=minor, patch=patch, log=log))
         self.save()
 
-    def add_comment(self, parent_comment_id, content, user):
-        comment = Comment(content=content, user_id=user.id,nickname=user.nickname,email=user.email)
-        if parent_comment_id:
-            parent_coment = self.comments.filter(id=parent_comment_id)
-            if not parent_coment:
-                raise Exception("Parent comment not found")
-            comment.parent_id = parent_comment_id
-            comment.sub_thread_count = parent_coment.sub_thread_count + 1
-        self.comments.append(comment)
-        self.save()
\ No newline at end of file
@@ -0,0 +1,23 @@
+import mongoengine as me
+from enum import Enum
+from datetime import datetime, timezone
+
+
+class VoteDirection(Enum):
+    UP = 1
+    DOWN = -1
+
+
+class GameVote(me.Document):
+    game_id = me.ObjectIdField(required=True)
+    user_id = me.ObjectIdField(required=True)
+    user_nickname = me.StringField()
+    direction = me.EnumField(VoteDirection, required=True)
+    created_at = me.DateTimeField(default=lambda: datetime.now(timezone.utc))
+    meta = {
+        "collection": "game_vote",
+        "indexes": [
+            {"fields": ("game_id", "user_id"), "unique": True},
+            ("game_id", "direction", "-created_at", "-id"),
+        ],
+    }
@@ -0,0 +1,31 @@
+import mongoengine as me
+
+
+class PlaySession(me.Document):
+    """A finished play session, written once when it ends."""
+
+    game_id = me.ObjectIdField(required=True)
+    player = me.StringField()
+    started_at = me.DateTimeField(required=True)
+    ended_at = me.DateTimeField(required=True)
+    duration = me.IntField(min_value=0, default=0)
+    meta = {
+        "collection": "play_session",
+        "indexes": [("game_id", "-started_at")],
+    }
+
+
+class PlayStats(me.Document):
+    """Per game and UTC day play counters and a unique-player sketch."""
+
+    game_id = me.ObjectIdField(required=True)
+    day = me.DateTimeField(required=True)
+    sessions = me.IntField(min_value=0, default=0)
+    completed = me.IntField(min_value=0, default=0)
+    total_duration = me.IntField(min_value=0, default=0)
+    # Sparse HyperLogLog registers, see app.tools.hyperloglog.
+    players = me.DictField()
+    meta = {
+        "collection": "play_stats",
+        "indexes": [{"fields": ("game_id", "-day"), "unique": True}],
+    }
@@ -18,6 +18,8 @@ class User(me.Document):
     updated_at = me.DateTimeField(default=datetime.now(timezone.utc))
     meta = {"collection": "user"}
     roles = me.ListField(me.EnumField(UserRole), default=[])
+    # Carried in access tokens; bumping it revokes every token issued before.
+    token_version = me.IntField(default=0)
 
     def add_role(self, role):
         if any(role == added_role.value for added_role in self.roles):
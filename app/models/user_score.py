@@ -1,10 +1,71 @@
 import mongoengine as me
-from datetime import datetime, timezone
+from enum import Enum
+from datetime import datetime, timedelta, timezone
 
 
-class UserScore(me.EmbeddedDocument):
+class ScorePeriod(Enum):
+    ALL = "all"
+    DAY = "day"
+    WEEK = "week"
+
+    def window(self, at: datetime) -> tuple[datetime | None, datetime | None]:
+        """Start of the window containing at, and when its board can be dropped."""
+        if self is ScorePeriod.ALL:
+            return None, None
+        start = at.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self is ScorePeriod.DAY:
+            return start, start + timedelta(days=8)
+        start -= timedelta(days=start.weekday())
+        return start, start + timedelta(weeks=5)
+
+
+class UserScore(me.Document):
+    """A user's best score on a game within one leaderboard window."""
+
+    game_id = me.ObjectIdField(required=True)
+    period = me.EnumField(ScorePeriod, default=ScorePeriod.ALL)
+    window_start = me.DateTimeField(default=None)
     user_id = me.ObjectIdField(required=True)
     user_nickname = me.StringField()
-    created_at = me.DateTimeField(default=datetime.now(timezone.utc))
     score = me.IntField(0)
-    meta = {"collection": "score"}
+    achieved_at = me.DateTimeField()
+    created_at = me.DateTimeField(default=lambda: datetime.now(timezone.utc))
+    expires_at = me.DateTimeField(default=None)
+    meta = {
+        "collection": "score",
+        "indexes": [
+            {
+                "fields": ("game_id", "period", "window_start", "user_id"),
+                "unique": True,
+            },
+            ("game_id", "period", "window_start", "-score", "achieved_at", "user_id"),
+            {"fields": ["expires_at"], "expireAfterSeconds": 0},
+        ],
+    }
+
+
+class ScoreBucket(me.Document):
+    """How many entries of one leaderboard window score within one bucket.
+
+    bucket is score // SCORE_BUCKET_BASE ** level, kept for every level, so
+    dense score ranges are resolved by the narrower levels; ranks add up
+    buckets above an entry instead of counting every entry above it.
+    """
+
+    game_id = me.ObjectIdField(required=True)
+    period = me.EnumField(ScorePeriod, default=ScorePeriod.ALL)
+    window_start = me.DateTimeField(default=None)
+    level = me.IntField(default=0)
+    bucket = me.IntField(required=True)
+    count = me.IntField(default=0)
+    expires_at = me.DateTimeField(default=None)
+    meta = {
+        "collection": "score_bucket",
+        "indexes": [
+            {
+                "fields": ("game_id", "period", "window_start", "level", "bucket"),
+                "unique": True,
+            },
+            {"fields": ["expires_at"], "expireAfterSeconds": 0},
+        ],
+    }
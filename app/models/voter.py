@@ -5,4 +5,4 @@ from datetime import datetime, timezone
 class Voter(me.EmbeddedDocument):
     user_id = me.ObjectIdField(required=True)
     user_nickname = me.StringField()
-    created_at = me.DateTimeField(default=datetime.now(timezone.utc))
+    created_at = me.DateTimeField(default=lambda: datetime.now(timezone.utc))
@@ -1,6 +1,7 @@
-from typing import Type, TypeVar, Generic, List
+from typing import Type, TypeVar, Generic, List, Callable
 from mongoengine import Document
 from bson import ObjectId
+from app.tools.cursor import encode_cursor, decode_cursor
 
 T = TypeVar("T", bound=Document)
 
@@ -15,6 +16,22 @@ class BaseRepository(Generic[T]):
     def get_by_id(self, id: str) -> T:
         return self.model.objects(id=id).first()
 
+    def exists(self, id) -> bool:
+        return self.model.objects(id=id).only("id").first() is not None
+
+    def get_existing_ids(self, ids) -> set:
+        return set(self.model.objects(id__in=list(ids)).only("id").scalar("id"))
+
+    def run_in_transaction(self, callback: Callable):
+        """Run callback(session) in one transaction and return its result.
+
+        Retried on transient errors such as write conflicts, so callback
+        must only write through the session. Needs a replica set, as every
+        MongoDB transaction does.
+        """
+        with self.model._get_db().client.start_session() as session:
+            return session.with_transaction(callback)
+
     def add(self, entity: T) -> T:
         entity.save()
         return entity
@@ -25,3 +42,74 @@ class BaseRepository(Generic[T]):
 
     def delete(self, entity: T) -> None:
         entity.delete()
+
+    def _decode_position(self, cursor: str | None, sort_field: str) -> dict | None:
+        if not cursor:
+            return None
+        position = decode_cursor(cursor)
+        if position.get("d") not in ("next", "prev") or position.get("s") != sort_field:
+            raise Exception("Invalid cursor")
+        return position
+
+    def _keyset_match(self, sort_field: str, position: dict) -> dict:
+        op = "$lt" if position["d"] == "next" else "$gt"
+        return {
+            "$or": [
+                {sort_field: {op: position["v"]}},
+                {sort_field: position["v"], "_id": {op: position["i"]}},
+            ]
+        }
+
+    def _keyset_query(self, model_query, position: dict | None, page_size: int, sort_field: str):
+        """Range-limit and order a queryset to fetch one page in walk order."""
+        if position:
+            model_query = model_query.filter(
+                __raw__=self._keyset_match(sort_field, position)
+            )
+        order = "" if position and position["d"] == "prev" else "-"
+        return model_query.order_by(f"{order}{sort_field}", f"{order}id").limit(
+            page_size + 1
+        )
+
+    def _keyset_page(
+        self,
+        sons,
+        position: dict | None,
+        page_size: int,
+        sort_field: str,
+        row_factory: Callable[[dict], object] | None = None,
+    ):
+        """Turn page_size + 1 raw rows fetched in walk order into a page.
+
+        The extra row only tells whether another page exists in the walk
+        direction; the boundary rows become the next/prev cursors.
+        """
+        sons = list(sons)
+        has_more = len(sons) > page_size
+        sons = sons[:page_size]
+        walking_back = position is not None and position["d"] == "prev"
+        if walking_back:
+            sons.reverse()
+
+        next_cursor = prev_cursor = None
+        if sons:
+            if walking_back or has_more:
+                next_cursor = encode_cursor(
+                    {
+                        "d": "next",
+                        "s": sort_field,
+                        "v": sons[-1].get(sort_field),
+                        "i": sons[-1]["_id"],
+                    }
+                )
+            if has_more if walking_back else position is not None:
+                prev_cursor = encode_cursor(
+                    {
+                        "d": "prev",
+                        "s": sort_field,
+                        "v": sons[0].get(sort_field),
+                        "i": sons[0]["_id"],
+                    }
+                )
+        row_factory = row_factory or self.model._from_son
+        return [row_factory(son) for son in sons], next_cursor, prev_cursor
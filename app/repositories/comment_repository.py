@@ -0,0 +1,302 @@
+from app.repositories.base_repository import BaseRepository
+from app.models.comment import Comment
+from app.models.game import Game
+from app.models.game_vote import VoteDirection
+from app.tools.cursor import encode_cursor
+from bson import ObjectId
+from datetime import datetime, timezone
+from pymongo import InsertOne, UpdateOne, UpdateMany, ReturnDocument
+
+LISTING_EXCLUDED_FIELDS = ("upvote_list", "downvote_list")
+
+PATH_SEPARATOR = "/"
+
+COMMENT_VOTE_FIELDS = {
+    VoteDirection.UP: ("upvote", "upvote_list"),
+    VoteDirection.DOWN: ("downvote", "downvote_list"),
+}
+
+
+class CommentRepository(BaseRepository[Comment]):
+    def __init__(self):
+        super().__init__(Comment)
+
+    def _subtree_match(self, comment) -> dict:
+        """Raw filter for every descendant of comment: one prefix range on (game_id, path)."""
+        return {"game_id": comment.game_id, "path": {"$regex": f"^{comment.path}{PATH_SEPARATOR}"}}
+
+    def _ancestor_ids(self, comment) -> list:
+        return [ObjectId(id) for id in comment.path.split(PATH_SEPARATOR)[:-1]]
+
+    def add(self, entity: Comment, parent: Comment | None = None) -> Comment:
+        """Insert a comment under parent and count it on every ancestor.
+
+        The path is fixed before the insert, so the comment is reachable by
+        its thread's subtree range as soon as it exists.
+        """
+        entity.id = entity.id or ObjectId()
+        if parent:
+            entity.parent_id = parent.id
+            entity.root_id = parent.root_id or parent.id
+            entity.path = f"{parent.path}{PATH_SEPARATOR}{entity.id}"
+            entity.depth = parent.depth + 1
+        else:
+            entity.path = str(entity.id)
+        entity.save(force_insert=True)
+        Game.objects(id=entity.game_id).update_one(inc__comment_count=1, inc__revision=1)
+        if parent:
+            self.model._get_collection().bulk_write(
+                [
+                    UpdateMany(
+                        {"_id": {"$in": self._ancestor_ids(entity)}},
+                        {"$inc": {"sub_thread_count": 1}},
+                    ),
+                    UpdateOne({"_id": parent.id}, {"$inc": {"reply_count": 1}}),
+                ],
+                ordered=False,
+            )
+        return entity
+
+    def delete(self, entity: Comment) -> int:
+        """Delete a comment with its whole subtree; returns how many were removed.
+
+        The comment goes first, so a concurrent or retried delete finds it
+        gone and leaves the counters alone, and a reply that slips in after
+        it is still inside the subtree range removed next.
+        """
+        collection = self.model._get_collection()
+        if not collection.delete_one({"_id": entity.id}).deleted_count:
+            return 0
+        deleted = 1 + collection.delete_many(self._subtree_match(entity)).deleted_count
+        Game.objects(id=entity.game_id).update_one(
+            __raw__={"$inc": {"comment_count": -deleted, "revision": 1}}
+        )
+        if entity.parent_id:
+            collection.bulk_write(
+                [
+                    UpdateMany(
+                        {"_id": {"$in": self._ancestor_ids(entity)}},
+                        {"$inc": {"sub_thread_count": -deleted}},
+                    ),
+                    UpdateOne({"_id": entity.parent_id}, {"$inc": {"reply_count": -1}}),
+                ],
+                ordered=False,
+            )
+        return deleted
+
+    def get_subtree(self, comment: Comment, cursor: str | None, page_size: int):
+        """Descendants of comment in thread order, one page at a time.
+
+        Sorting by path lists every comment right after its parent, children
+        oldest first since ObjectIds grow with time. Returns the page and the
+        next cursor.
+        """
+        if not page_size:
+            page_size = 100
+        match = self._subtree_match(comment)
+        position = self._decode_position(cursor, "path")
+        if position:
+            if position["d"] != "next":
+                raise Exception("Invalid cursor")
+            match["path"]["$gt"] = position["v"]
+        rows = list(
+            self.model.objects(__raw__=match)
+            .exclude(*LISTING_EXCLUDED_FIELDS)
+            .order_by("path")
+            .limit(page_size + 1)
+        )
+        next_cursor = None
+        if len(rows) > page_size:
+            next_cursor = encode_cursor({"d": "next", "s": "path", "v": rows[page_size - 1].path})
+        return rows[:page_size], next_cursor
+
+    def get_latest_replies(self, game_id, root_ids: list, per_root: int) -> dict:
+        """The per_root newest replies anywhere in each root's thread, in one query."""
+        if not root_ids or per_root <= 0:
+            return {}
+        groups = self.model.objects(game_id=game_id, root_id__in=root_ids).aggregate(
+            [
+                {"$project": {field: 0 for field in LISTING_EXCLUDED_FIELDS}},
+                {
+                    "$group": {
+                        "_id": "$root_id",
+                        "replies": {
+                            "$topN": {
+                                "n": per_root,
+                                "sortBy": {"created_at": -1, "_id": -1},
+                                "output": "$$ROOT",
+                            }
+                        },
+                    }
+                },
+            ]
+        )
+        return {
+            group["_id"]: [self.model._from_son(son) for son in group["replies"]]
+            for group in groups
+        }
+
+    def count_by_user(self, game_id, user_id) -> int:
+        return self.model.objects(game_id=game_id, user_id=user_id).count()
+
+    def get_page(self, game_id, parent_id, cursor: str | None, page_size: int):
+        """Newest-first page of a game's top-level comments, or of one comment's replies."""
+        if not page_size:
+            page_size = 20
+        position = self._decode_position(cursor, "created_at")
+        sons = self._keyset_query(
+            self.model.objects(game_id=ObjectId(game_id), parent_id=parent_id).exclude(
+                *LISTING_EXCLUDED_FIELDS
+            ),
+            position,
+            page_size,
+            "created_at",
+        ).as_pymongo()
+        return self._keyset_page(sons, position, page_size, "created_at")
+
+    def delete_by_game(self, game_id) -> None:
+        self.model.objects(game_id=game_id).delete()
+
+    def vote(
+        self, game_id, comment_id, user_id, user_nickname: str, direction: VoteDirection
+    ) -> tuple[VoteDirection | None, dict] | None:
+        """Cast, switch or withdraw a comment vote with conditional updates.
+
+        Each attempt only matches the comment while the user's vote is in the
+        state it expects, so concurrent clicks can neither double count nor
+        lose a vote. Returns the user's current direction and the comment's
+        counters, or None if there is no such comment.
+        """
+        game_id, comment_id, user_id = ObjectId(game_id), ObjectId(comment_id), ObjectId(user_id)
+        counter, voters = COMMENT_VOTE_FIELDS[direction]
+        other_counter, other_voters = COMMENT_VOTE_FIELDS[VoteDirection(-direction.value)]
+        voter = {
+            "user_id": user_id,
+            "user_nickname": user_nickname,
+            "created_at": datetime.now(timezone.utc),
+        }
+        attempts = [
+            (
+                direction,
+                {
+                    f"{voters}.user_id": {"$ne": user_id},
+                    f"{other_voters}.user_id": {"$ne": user_id},
+                },
+                {"$push": {voters: voter}, "$inc": {counter: 1}},
+            ),
+            (
+                direction,
+                {f"{other_voters}.user_id": user_id},
+                {
+                    "$push": {voters: voter},
+                    "$pull": {other_voters: {"user_id": user_id}},
+                    "$inc": {counter: 1, other_counter: -1},
+                },
+            ),
+            (
+                None,
+                {f"{voters}.user_id": user_id},
+                {"$pull": {voters: {"user_id": user_id}}, "$inc": {counter: -1}},
+            ),
+        ]
+        collection = self.model._get_collection()
+        for current, condition, update in attempts:
+            comment = collection.find_one_and_update(
+                {"_id": comment_id, "game_id": game_id, **condition},
+                update,
+                projection={"upvote": 1, "downvote": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            if comment:
+                return current, comment
+        return None
+
+    def migrate_embedded_comments(self) -> tuple[int, int]:
+        """Move Game.comments entries into the comment collection.
+
+        Comments keep their ids, so an interrupted run can be started again:
+        already copied comments are skipped, and each game's array is only
+        unset once all of its comments are stored.
+        """
+        games = Game._get_collection()
+        migrated_games = migrated_comments = 0
+        for game in games.find({"comments": {"$exists": True}}, {"comments": 1}):
+            comments = game.get("comments") or []
+            if any("id" not in comment for comment in comments):
+                for comment in comments:
+                    comment.setdefault("id", ObjectId())
+                games.update_one({"_id": game["_id"]}, {"$set": {"comments": comments}})
+            existing = set(
+                self.model.objects(id__in=[comment["id"] for comment in comments]).scalar("id")
+            )
+            operations = [
+                InsertOne(
+                    {
+                        **{key: value for key, value in comment.items() if key != "id"},
+                        "_id": comment["id"],
+                        "game_id": game["_id"],
+                        "parent_id": comment.get("parent_id")
+                        if isinstance(comment.get("parent_id"), ObjectId)
+                        else None,
+                    }
+                )
+                for comment in comments
+                if comment["id"] not in existing
+            ]
+            if operations:
+                self.model._get_collection().bulk_write(operations)
+            self.rebuild_threads(game["_id"])
+            games.update_one({"_id": game["_id"]}, {"$unset": {"comments": ""}})
+            migrated_games += 1
+            migrated_comments += len(operations)
+        return migrated_games, migrated_comments
+
+    def rebuild_threads(self, game_id) -> int:
+        """Recompute paths, depths and reply counts of a game's comments from parent_id.
+
+        Comments whose parent no longer exists become roots. Also resets the
+        game's comment_count; returns it.
+        """
+        comments = {
+            son["_id"]: son
+            for son in self.model.objects(game_id=game_id)
+            .only("id", "parent_id")
+            .as_pymongo()
+        }
+        children = {}
+        for son in comments.values():
+            if son.get("parent_id") not in comments:
+                son["parent_id"] = None
+            children.setdefault(son["parent_id"], []).append(son["_id"])
+
+        updates = []
+
+        def walk(id, parent_path, root_id, depth) -> int:
+            path = f"{parent_path}{PATH_SEPARATOR}{id}" if parent_path else str(id)
+            replies = sorted(children.get(id, []))
+            subtree = sum(walk(reply, path, root_id or id, depth + 1) for reply in replies)
+            updates.append(
+                UpdateOne(
+                    {"_id": id},
+                    {
+                        "$set": {
+                            "parent_id": comments[id]["parent_id"],
+                            "root_id": root_id,
+                            "path": path,
+                            "depth": depth,
+                            "reply_count": len(replies),
+                            "sub_thread_count": subtree,
+                        }
+                    },
+                )
+            )
+            return subtree + 1
+
+        for root in children.get(None, []):
+            walk(root, None, None, 0)
+        if updates:
+            self.model._get_collection().bulk_write(updates, ordered=False)
+        Game.objects(id=game_id).update_one(
+            set__comment_count=len(comments), inc__revision=1
+        )
+        return len(comments)
@@ -1,14 +1,223 @@
 from app.repositories.base_repository import BaseRepository
 from app.models.game import Game
+from app.tools.cache import TTLCache
+from app.tools.counter_buffer import CounterBuffer
+from app.tools.search import query_prefixes, search_prefixes
+from app.tools.ranking import wilson_score_expression, hot_score_expression
 from typing import List
 from mongoengine import Q
+from pymongo import UpdateOne, ReturnDocument
+from bson import ObjectId
 from datetime import datetime
 from math import ceil
 
+LISTING_FIELDS = (
+    "id",
+    "publisher_id",
+    "title",
+    "description",
+    "tags",
+    "game_engine",
+    "upvote",
+    "downvote",
+    "played_count",
+    "created_at",
+    "thumbnail",
+    "hot_score",
+    "top_score",
+    "revision",
+)
+
+SORT_FIELDS = {"new": "created_at", "hot": "hot_score", "top": "top_score"}
+
+count_cache = TTLCache("GAME_COUNT_CACHE", maxsize=1024, ttl=30)
+facet_cache = TTLCache("GAME_FACET_CACHE", maxsize=256, ttl=300)
+counter_buffer = CounterBuffer(
+    "GAME_COUNTER_BUFFER", lambda batch: GameRepository().apply_counter_deltas(batch)
+)
+
+
+class GameListingRow:
+    """Read-only listing row built from a projected raw document.
+
+    Carries only LISTING_FIELDS, so links, search prefixes and change
+    logs never leave the server when listing games.
+    """
+
+    __slots__ = LISTING_FIELDS
+
+    def __init__(self, son: dict):
+        self.id = son["_id"]
+        self.publisher_id = son.get("publisher_id")
+        self.title = son.get("title")
+        self.description = son.get("description")
+        self.tags = son.get("tags", [])
+        self.game_engine = son.get("game_engine")
+        self.upvote = son.get("upvote", 0)
+        self.downvote = son.get("downvote", 0)
+        self.played_count = son.get("played_count", 0)
+        self.created_at = son.get("created_at")
+        self.thumbnail = son.get("thumbnail")
+        self.hot_score = son.get("hot_score", 0)
+        self.top_score = son.get("top_score", 0)
+        self.revision = son.get("revision", 0)
+
 
 class GameRepository(BaseRepository[Game]):
-    def __init__(self):
+    def __init__(self, estimated_count: bool = False):
         super().__init__(Game)
+        self.estimated_count = estimated_count
+
+    def add(self, entity: Game) -> Game:
+        entity = super().add(entity)
+        self.refresh_rankings([entity.id])
+        count_cache.clear()
+        self._apply_facet_delta(entity, 1)
+        return entity
+
+    def delete(self, entity: Game) -> None:
+        super().delete(entity)
+        counter_buffer.discard(entity.id)
+        count_cache.clear()
+        self._apply_facet_delta(entity, -1)
+
+    def _filter_key(
+        self,
+        tags: List[str] | None,
+        game_engine: str,
+        created_date: datetime | None,
+    ) -> tuple:
+        return (
+            tuple(sorted(set(tags or []))),
+            game_engine or None,
+            created_date.isoformat() if created_date else None,
+        )
+
+    def _build_filter(
+        self,
+        tags: List[str] | None,
+        game_engine: str,
+        created_date: datetime | None,
+    ) -> Q:
+        filter = Q()
+        if tags:
+            filter &= Q(tags__in=[tag for tag in tags])
+        if game_engine:
+            filter &= Q(game_engine=game_engine)
+        if created_date:
+            filter &= Q(created_at=created_date)
+        return filter
+
+    def get_revision(self, id) -> int | None:
+        """The game's revision, or None if it does not exist."""
+        son = self.model._get_collection().find_one({"_id": ObjectId(id)}, {"revision": 1})
+        return None if son is None else son.get("revision", 0)
+
+    def bump_revision(self, id) -> None:
+        self.model.objects(id=id).update_one(inc__revision=1)
+
+    def get_file(self, id: str, field: str):
+        game = self.model.objects(id=id).only(field).first()
+        if not game or not game[field]:
+            return None
+        return game[field].get()
+
+    def count(
+        self,
+        tags: List[str] | None,
+        game_engine: str,
+        created_date: datetime | None,
+    ) -> int:
+        """Total matching games, cached per normalized filter.
+
+        Creating or deleting a game clears the cache; other writers (another
+        worker) are picked up when the TTL expires. With estimated_count the
+        unfiltered total comes from collection metadata instead of a scan.
+        """
+        key = self._filter_key(tags, game_engine, created_date)
+        count = count_cache.get(key)
+        if count is None:
+            if self.estimated_count and key == self._filter_key(None, None, None):
+                count = self.model._get_collection().estimated_document_count()
+            else:
+                count = self.model.objects(
+                    self._build_filter(tags, game_engine, created_date)
+                ).count()
+            count_cache.set(key, count)
+        return count
+
+    def get_facets(
+        self,
+        tags: List[str] | None,
+        game_engine: str,
+        created_date: datetime | None,
+    ) -> dict:
+        """Tag and engine counts of the games matching the listing filter.
+
+        Computed with one $facet aggregation and cached per filter; creates
+        and deletes adjust the cached counts in place of a recount.
+        """
+        key = self._filter_key(tags, game_engine, created_date)
+        facets = facet_cache.get(key)
+        if facets is None:
+            pipeline = [
+                {
+                    "$facet": {
+                        "tags": [
+                            {"$unwind": "$tags"},
+                            {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+                        ],
+                        "game_engine": [
+                            {"$group": {"_id": "$game_engine", "count": {"$sum": 1}}},
+                        ],
+                    }
+                }
+            ]
+            result = next(
+                self.model.objects(
+                    self._build_filter(tags, game_engine, created_date)
+                ).aggregate(pipeline)
+            )
+            facets = {
+                name: {
+                    bucket["_id"]: bucket["count"]
+                    for bucket in buckets
+                    if bucket["_id"] is not None
+                }
+                for name, buckets in result.items()
+            }
+            facet_cache.set(key, facets)
+        return facets
+
+    def _apply_facet_delta(self, game: Game, delta: int):
+        def apply(key, facets):
+            tags, game_engine, created_date = key
+            if (
+                (tags and not set(tags) & set(game.tags))
+                or (game_engine and game.game_engine != game_engine)
+                or (created_date and game.created_at.isoformat() != created_date)
+            ):
+                return facets
+            updated = {name: dict(counts) for name, counts in facets.items()}
+            for name, values in (
+                ("tags", set(game.tags)),
+                ("game_engine", {game.game_engine}),
+            ):
+                for value in values:
+                    count = updated[name].get(value, 0) + delta
+                    if count > 0:
+                        updated[name][value] = count
+                    else:
+                        updated[name].pop(value, None)
+            return updated
+
+        facet_cache.map_values(apply)
+
+    def _get_listing(self, model_query) -> List[GameListingRow]:
+        return [
+            GameListingRow(son)
+            for son in model_query.only(*LISTING_FIELDS).as_pymongo()
+        ]
 
     def get_by_filter(
         self,
@@ -17,21 +226,195 @@ class GameRepository(BaseRepository[Game]):
         tags: List[str] | None,
         game_engine: str,
         created_date: datetime | None,
+        sort: str = "new",
     ):
-        filter = Q()
+        sort_field = self._sort_field(sort)
         if not current_page:
             current_page = 0
         if not page_size:
             page_size = 10
-        if tags:
-            filter &= Q(tags__in=[tag for tag in tags])
-        if game_engine:
-            filter &= Q(game_engine=game_engine)
-        if created_date:
-            filter &= Q(created_at=created_date)
+        filter = self._build_filter(tags, game_engine, created_date)
         model_query = self.model.objects(filter)
         return (
-            model_query.skip(current_page * page_size).limit(page_size),
+            self._get_listing(
+                model_query.order_by(f"-{sort_field}", "-id")
+                .skip(current_page * page_size)
+                .limit(page_size)
+            ),
             current_page,
-            max(ceil(model_query.count() / page_size) - 1, 0),
+            max(ceil(self.count(tags, game_engine, created_date) / page_size) - 1, 0),
         )
+
+    def _sort_field(self, sort: str | None) -> str:
+        if sort is None:
+            return SORT_FIELDS["new"]
+        if sort not in SORT_FIELDS:
+            raise Exception(f"Sort must be one of {', '.join(SORT_FIELDS)}")
+        return SORT_FIELDS[sort]
+
+    def get_by_cursor(
+        self,
+        cursor: str | None,
+        page_size: int,
+        tags: List[str] | None,
+        game_engine: str,
+        created_date: datetime | None,
+        with_count: bool = False,
+        sort: str = "new",
+    ):
+        """Keyset paging on (sort field, _id), highest first.
+
+        Cursors are opaque to the client and carry the boundary row plus the
+        direction to walk from it, so every page is a range scan instead of
+        a skip over all previous pages.
+        """
+        if not page_size:
+            page_size = 10
+        sort_field = self._sort_field(sort)
+        position = self._decode_position(cursor, sort_field)
+        total = self.count(tags, game_engine, created_date) if with_count else None
+        model_query = self.model.objects(
+            self._build_filter(tags, game_engine, created_date)
+        )
+        sons = (
+            self._keyset_query(model_query, position, page_size, sort_field)
+            .only(*LISTING_FIELDS)
+            .as_pymongo()
+        )
+        games, next_cursor, prev_cursor = self._keyset_page(
+            sons, position, page_size, sort_field, GameListingRow
+        )
+        return games, next_cursor, prev_cursor, total
+
+    def search(self, query: str, cursor: str | None, page_size: int, prefix: bool = False):
+        """Ranked full-text search, or word-prefix matching for autocomplete.
+
+        Full-text pages walk (textScore, _id) from the text index; prefix
+        pages walk (created_at, _id) on the search_prefixes index.
+        """
+        if not page_size:
+            page_size = 10
+        position = self._decode_position(cursor, "created_at" if prefix else "score")
+        if prefix:
+            terms = query_prefixes(query)
+            if not terms:
+                return [], None, None
+            sons = (
+                self._keyset_query(
+                    self.model.objects(search_prefixes__all=terms),
+                    position,
+                    page_size,
+                    "created_at",
+                )
+                .only(*LISTING_FIELDS)
+                .as_pymongo()
+            )
+            return self._keyset_page(
+                sons, position, page_size, "created_at", GameListingRow
+            )
+
+        projection = {self.model._fields[field].db_field: 1 for field in LISTING_FIELDS}
+        pipeline = [
+            {"$match": {"$text": {"$search": query}}},
+            {"$project": {**projection, "score": {"$meta": "textScore"}}},
+        ]
+        if position:
+            pipeline.append({"$match": self._keyset_match("score", position)})
+        direction = 1 if position and position["d"] == "prev" else -1
+        pipeline += [
+            {"$sort": {"score": direction, "_id": direction}},
+            {"$limit": page_size + 1},
+        ]
+        sons = self.model._get_collection().aggregate(pipeline)
+        return self._keyset_page(sons, position, page_size, "score", GameListingRow)
+
+    def _counter_update(self, inc: dict) -> list:
+        """Pipeline update adding inc to the counters and reranking from them."""
+        return [
+            {
+                "$set": {
+                    **{field: {"$add": [f"${field}", delta]} for field, delta in inc.items()},
+                    "revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]},
+                }
+            },
+            {
+                "$set": {
+                    "hot_score": hot_score_expression(),
+                    "top_score": wilson_score_expression(),
+                }
+            },
+        ]
+
+    def increment_counters(self, id, inc: dict, session=None) -> dict | None:
+        """Add inc to the game's counters and return them, or None if the game is gone.
+
+        With the counter buffer enabled the write is deferred and the counts
+        returned are the stored ones plus everything still buffered. Inside
+        a transaction (session) it is never buffered, so it commits or
+        aborts with the transaction's other writes.
+        """
+        id = ObjectId(id)
+        collection = self.model._get_collection()
+        projection = {"upvote": 1, "downvote": 1, "played_count": 1}
+        if session is not None or not counter_buffer.enabled:
+            return collection.find_one_and_update(
+                {"_id": id},
+                self._counter_update(inc),
+                projection=projection,
+                return_document=ReturnDocument.AFTER,
+                session=session,
+            )
+        counts = collection.find_one({"_id": id}, projection)
+        if counts is None:
+            return None
+        counter_buffer.add(id, inc)
+        for field, delta in (counter_buffer.pending(id) or {}).items():
+            counts[field] = counts.get(field, 0) + delta
+        return counts
+
+    def apply_counter_deltas(self, batch: dict) -> None:
+        self.model._get_collection().bulk_write(
+            [
+                UpdateOne({"_id": id}, self._counter_update(inc))
+                for id, inc in batch.items()
+            ],
+            ordered=False,
+        )
+
+    def refresh_rankings(self, ids: List | None = None) -> int:
+        """Recompute hot_score and top_score from the stored counters.
+
+        Runs as one pipeline update, so it is safe to call after every vote
+        or play even when they race; with no ids it refreshes every game.
+        """
+        query = {"_id": {"$in": ids}} if ids is not None else {}
+        return (
+            self.model._get_collection()
+            .update_many(
+                query,
+                [
+                    {
+                        "$set": {
+                            "hot_score": hot_score_expression(),
+                            "top_score": wilson_score_expression(),
+                        }
+                    }
+                ],
+            )
+            .modified_count
+        )
+
+    def reindex_search(self, batch_size: int = 500) -> int:
+        """Recompute search_prefixes for games saved before it existed."""
+        collection = self.model._get_collection()
+        updated = 0
+        batch = []
+        for game in self.model.objects.only("title", "tags").as_pymongo():
+            prefixes = search_prefixes([game.get("title"), *game.get("tags", [])])
+            batch.append(UpdateOne({"_id": game["_id"]}, {"$set": {"search_prefixes": prefixes}}))
+            if len(batch) >= batch_size:
+                updated += collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+        return updated
@@ -0,0 +1,152 @@
+from app.repositories.base_repository import BaseRepository
+from app.models.game import Game
+from app.models.game_vote import GameVote, VoteDirection
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+
+
+class GameVoteRepository(BaseRepository[GameVote]):
+    def __init__(self):
+        super().__init__(GameVote)
+
+    def get_vote(self, game_id, user_id) -> GameVote:
+        return self.model.objects(game_id=game_id, user_id=user_id).first()
+
+    def toggle(self, game_id, user_id, user_nickname: str, direction: VoteDirection, session):
+        """Cast, switch or withdraw a vote within session's transaction.
+
+        Returns the (previous, current) direction of the user's vote: a
+        click in the direction already voted withdraws the vote. The read
+        and the write share the transaction, so a concurrent click on the
+        same vote is a write conflict and gets retried, never double counted.
+        """
+        collection = self.model._get_collection()
+        match = {"game_id": game_id, "user_id": user_id}
+        vote = collection.find_one(match, {"direction": 1}, session=session)
+        previous = VoteDirection(vote["direction"]) if vote else None
+        if previous == direction:
+            collection.delete_one({"_id": vote["_id"]}, session=session)
+            return previous, None
+        collection.update_one(
+            match,
+            {
+                "$set": {
+                    "direction": direction.value,
+                    "user_nickname": user_nickname,
+                    "created_at": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True,
+            session=session,
+        )
+        return previous, direction
+
+    def get_voters(self, game_id, direction: VoteDirection, cursor: str | None, page_size: int):
+        if not page_size:
+            page_size = 20
+        position = self._decode_position(cursor, "created_at")
+        sons = self._keyset_query(
+            self.model.objects(game_id=game_id, direction=direction),
+            position,
+            page_size,
+            "created_at",
+        ).as_pymongo()
+        return self._keyset_page(sons, position, page_size, "created_at")
+
+    def delete_by_game(self, game_id) -> None:
+        self.model.objects(game_id=game_id).delete()
+
+    def reconcile_counters(self, batch_size: int = 500) -> list:
+        """Reset every game's upvote/downvote from its game_vote records.
+
+        Votes and counters now commit in one transaction; this repairs
+        counters that drifted before that, or were edited by hand. It
+        recounts the records and rewrites only the games that drifted;
+        returns their ids. Votes cast while it runs can make it misread a
+        game, so run it at low traffic; a second run settles any such game.
+        """
+        counts = {}
+        for row in self.model._get_collection().aggregate(
+            [{"$group": {"_id": {"game_id": "$game_id", "direction": "$direction"}, "n": {"$sum": 1}}}]
+        ):
+            counts.setdefault(row["_id"]["game_id"], {})[row["_id"]["direction"]] = row["n"]
+        games = Game._get_collection()
+        drifted, batch = [], []
+        for game in games.find({}, {"upvote": 1, "downvote": 1}):
+            votes = counts.get(game["_id"], {})
+            upvote = votes.get(VoteDirection.UP.value, 0)
+            downvote = votes.get(VoteDirection.DOWN.value, 0)
+            if game.get("upvote", 0) == upvote and game.get("downvote", 0) == downvote:
+                continue
+            drifted.append(game["_id"])
+            batch.append(
+                UpdateOne(
+                    {"_id": game["_id"]},
+                    {
+                        "$set": {"upvote": upvote, "downvote": downvote},
+                        "$inc": {"revision": 1},
+                    },
+                )
+            )
+            if len(batch) >= batch_size:
+                games.bulk_write(batch, ordered=False)
+                batch = []
+        if batch:
+            games.bulk_write(batch, ordered=False)
+        return drifted
+
+    def migrate_embedded_votes(self) -> tuple[int, int]:
+        """Move Game.upvote_list/downvote_list entries into game_vote.
+
+        Idempotent: votes are upserted on (game_id, user_id), and each game's
+        counters are reset from game_vote before its arrays are unset, so an
+        interrupted run can simply be started again. A user found in both
+        lists keeps the upvote.
+        """
+        games = Game._get_collection()
+        migrated_games = migrated_votes = 0
+        query = {
+            "$or": [
+                {"upvote_list": {"$exists": True}},
+                {"downvote_list": {"$exists": True}},
+            ]
+        }
+        for game in games.find(query, {"upvote_list": 1, "downvote_list": 1}):
+            operations = [
+                UpdateOne(
+                    {"game_id": game["_id"], "user_id": voter["user_id"]},
+                    {
+                        "$set": {"direction": direction.value},
+                        "$setOnInsert": {
+                            "user_nickname": voter.get("user_nickname"),
+                            "created_at": voter.get("created_at")
+                            or game["_id"].generation_time,
+                        },
+                    },
+                    upsert=True,
+                )
+                for field, direction in (
+                    ("downvote_list", VoteDirection.DOWN),
+                    ("upvote_list", VoteDirection.UP),
+                )
+                for voter in game.get(field) or []
+            ]
+            if operations:
+                self.model._get_collection().bulk_write(operations)
+            games.update_one(
+                {"_id": game["_id"]},
+                {
+                    "$set": {
+                        "upvote": self.model.objects(
+                            game_id=game["_id"], direction=VoteDirection.UP
+                        ).count(),
+                        "downvote": self.model.objects(
+                            game_id=game["_id"], direction=VoteDirection.DOWN
+                        ).count(),
+                    },
+                    "$unset": {"upvote_list": "", "downvote_list": ""},
+                },
+            )
+            migrated_games += 1
+            migrated_votes += len(operations)
+        return migrated_games, migrated_votes
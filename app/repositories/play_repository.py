@@ -0,0 +1,133 @@
+from app.repositories.base_repository import BaseRepository
+from app.models.play_session import PlaySession, PlayStats
+from app.tools.counter_buffer import WriteBuffer
+from app.tools import hyperloglog
+from bson import ObjectId
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+class PlayStatsBuffer(WriteBuffer):
+    """Merges {"inc": {field: delta}, "players": {register: rank}} per (game_id, day)."""
+
+    def merge(self, current, value):
+        merged = {"inc": dict((current or {}).get("inc", {})), "players": {}}
+        for field, delta in (value or {}).get("inc", {}).items():
+            merged["inc"][field] = merged["inc"].get(field, 0) + delta
+        merged["players"] = hyperloglog.merge(
+            [(current or {}).get("players", {}), (value or {}).get("players", {})]
+        )
+        return merged
+
+
+class SessionBuffer(WriteBuffer):
+    """Finished session rows keyed by session id; a repeated end keeps the first."""
+
+    def merge(self, current, value):
+        return current or value
+
+
+play_stats_buffer = PlayStatsBuffer(
+    "PLAY_BUFFER", lambda batch: PlayRepository().write_stats(batch)
+)
+session_buffer = SessionBuffer(
+    "PLAY_BUFFER", lambda batch: PlayRepository().write_sessions(batch)
+)
+
+
+def _day(at: datetime) -> datetime:
+    return at.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+class PlayRepository(BaseRepository[PlaySession]):
+    def __init__(self):
+        super().__init__(PlaySession)
+
+    def record_start(self, game_id, player: str, at: datetime) -> None:
+        index, rank = hyperloglog.register(player)
+        play_stats_buffer.add(
+            (ObjectId(game_id), _day(at)),
+            {"inc": {"sessions": 1}, "players": {str(index): rank}},
+        )
+
+    def record_end(self, session_id: ObjectId, game_id, player: str, at: datetime) -> int:
+        started_at = session_id.generation_time
+        duration = max(int((at - started_at).total_seconds()), 0)
+        session_buffer.add(
+            session_id,
+            {
+                "_id": session_id,
+                "game_id": ObjectId(game_id),
+                "player": player,
+                "started_at": started_at,
+                "ended_at": at,
+                "duration": duration,
+            },
+        )
+        return duration
+
+    def write_stats(self, batch: dict) -> None:
+        PlayStats._get_collection().bulk_write(
+            [
+                UpdateOne(
+                    {"game_id": game_id, "day": day},
+                    {
+                        "$inc": value["inc"],
+                        "$max": {
+                            f"players.{index}": rank
+                            for index, rank in value["players"].items()
+                        },
+                    },
+                    upsert=True,
+                )
+                for (game_id, day), value in batch.items()
+            ],
+            ordered=False,
+        )
+
+    def write_sessions(self, batch: dict) -> None:
+        """Append finished sessions, then count the newly stored ones in play_stats.
+
+        A session id is stored once; an end reported again in a later batch
+        hits the primary key and is not counted twice.
+        """
+        rows = list(batch.values())
+        try:
+            self.model._get_collection().insert_many(rows, ordered=False)
+            stored = rows
+        except BulkWriteError as error:
+            if any(e["code"] != 11000 for e in error.details["writeErrors"]):
+                raise
+            duplicates = {e["index"] for e in error.details["writeErrors"]}
+            stored = [row for index, row in enumerate(rows) if index not in duplicates]
+        totals = {}
+        for row in stored:
+            key = (row["game_id"], _day(row["started_at"]))
+            completed, duration = totals.get(key, (0, 0))
+            totals[key] = (completed + 1, duration + row["duration"])
+        if totals:
+            PlayStats._get_collection().bulk_write(
+                [
+                    UpdateOne(
+                        {"game_id": game_id, "day": day},
+                        {"$inc": {"completed": completed, "total_duration": duration}},
+                        upsert=True,
+                    )
+                    for (game_id, day), (completed, duration) in totals.items()
+                ],
+                ordered=False,
+            )
+
+    def get_stats(self, game_id, since: datetime) -> list:
+        return list(
+            PlayStats.objects(game_id=ObjectId(game_id), day__gte=_day(since)).order_by("-day")
+        )
+
+    def delete_by_game(self, game_id) -> None:
+        # Flushed first so buffered writes cannot recreate the rows afterwards.
+        play_stats_buffer.flush()
+        session_buffer.flush()
+        self.model.objects(game_id=game_id).delete()
+        PlayStats.objects(game_id=game_id).delete()
+
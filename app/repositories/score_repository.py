@@ -0,0 +1,346 @@
+from app.repositories.base_repository import BaseRepository
+from app.models.user_score import UserScore, ScoreBucket, ScorePeriod
+from app.models.game import Game
+from bson import ObjectId
+from datetime import datetime, timezone
+from flask import current_app
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Board order: higher score first, then whoever reached it first.
+BOARD_ORDER = ("-score", "achieved_at", "user_id")
+SUBMIT_ATTEMPTS = 3
+UNCONDITIONAL = object()
+
+
+def _naive(at: datetime | None) -> datetime | None:
+    # Dates come back from MongoDB as naive UTC.
+    return at.replace(tzinfo=None) if at else None
+
+
+class ScoreRepository(BaseRepository[UserScore]):
+    def __init__(self):
+        super().__init__(UserScore)
+        # Changing either needs `flask games rebuild-score-buckets`.
+        self.bucket_base = current_app.config.get("SCORE_BUCKET_BASE", 32)
+        self.bucket_levels = current_app.config.get("SCORE_BUCKET_LEVELS", 6)
+
+    def _board(self, game_id, period: ScorePeriod, at: datetime | None = None) -> dict:
+        window_start, _ = period.window(at or datetime.now(timezone.utc))
+        return {
+            "game_id": ObjectId(game_id),
+            "period": period.value,
+            "window_start": window_start,
+        }
+
+    def _submit_operation(
+        self, board: dict, user_id, user_nickname: str, score: int, at: datetime, expires_at,
+        expected=UNCONDITIONAL,
+    ) -> UpdateOne:
+        """Best-score upsert of one user on one leaderboard window.
+
+        The pipeline keeps the higher of the stored and submitted score and
+        only moves achieved_at when the score improves, so the write is
+        idempotent. With expected, it only applies while the stored score is
+        still expected (None: no entry yet); otherwise the upsert collides
+        with the unique index, and the caller rereads and retries.
+        """
+        match = {**board, "user_id": user_id}
+        if expected is not UNCONDITIONAL:
+            match["score"] = {"$exists": False} if expected is None else expected
+        return UpdateOne(
+            match,
+            [
+                {
+                    "$set": {
+                        "achieved_at": {
+                            "$cond": [{"$gt": [score, "$score"]}, at, "$achieved_at"]
+                        },
+                        "score": {"$max": ["$score", score]},
+                        "user_nickname": user_nickname,
+                        "created_at": {"$ifNull": ["$created_at", at]},
+                        "expires_at": expires_at,
+                    }
+                }
+            ],
+            upsert=True,
+        )
+
+    def _stored_scores(self, records: list, at: datetime) -> dict:
+        """Current scores of records' entries, keyed by (game_id, period, window_start, user_id)."""
+        windows = [period.window(at)[0] for period in ScorePeriod]
+        sons = self.model._get_collection().find(
+            {
+                "game_id": {"$in": list({record[0] for record in records})},
+                "user_id": {"$in": list({record[1] for record in records})},
+                "window_start": {"$in": windows},
+            },
+            {"game_id": 1, "period": 1, "window_start": 1, "user_id": 1, "score": 1},
+        )
+        return {
+            (son["game_id"], son["period"], _naive(son["window_start"]), son["user_id"]): son["score"]
+            for son in sons
+        }
+
+    def submit(self, game_id, user_id, user_nickname: str, score: int) -> None:
+        self.submit_many([(game_id, user_id, user_nickname, score)])
+
+    def submit_many(self, records: list) -> set:
+        """Best-score upserts for (game_id, user_id, user_nickname, score) records.
+
+        The stored scores are read in one query, then all writes go out as
+        one unordered bulk_write conditioned on them, and the score buckets
+        of the entries that improved are moved in a second bulk_write. A
+        record that raced another submission is reread and retried; returns
+        the indexes of the records that still failed.
+        """
+        at = datetime.now(timezone.utc)
+        records = [
+            (ObjectId(game_id), ObjectId(user_id), user_nickname, score)
+            for game_id, user_id, user_nickname, score in records
+        ]
+        pending, failed = list(range(len(records))), set()
+        for _ in range(SUBMIT_ATTEMPTS):
+            if not pending:
+                break
+            stored = self._stored_scores([records[index] for index in pending], at)
+            operations, owners, moves = [], [], []
+            for index in pending:
+                game_id, user_id, user_nickname, score = records[index]
+                for period in ScorePeriod:
+                    window_start, expires_at = period.window(at)
+                    board = {"game_id": game_id, "period": period.value, "window_start": window_start}
+                    expected = stored.get((game_id, period.value, _naive(window_start), user_id))
+                    operations.append(
+                        self._submit_operation(
+                            board, user_id, user_nickname, score, at, expires_at, expected
+                        )
+                    )
+                    owners.append(index)
+                    moves.append(
+                        (board, expires_at, expected, score)
+                        if expected is None or score > expected
+                        else None
+                    )
+            errors = []
+            try:
+                self.model._get_collection().bulk_write(operations, ordered=False)
+            except BulkWriteError as error:
+                errors = error.details["writeErrors"]
+            rejected = {e["index"] for e in errors}
+            self._move_buckets(
+                [move for index, move in enumerate(moves) if move and index not in rejected]
+            )
+            # Unique-key collisions mean the stored score changed since it was read.
+            pending = sorted({owners[e["index"]] for e in errors if e["code"] == 11000})
+            failed |= {owners[e["index"]] for e in errors if e["code"] != 11000}
+            failed -= set(pending)
+        return failed | set(pending)
+
+    def _buckets(self, score: int) -> list:
+        """The score's bucket on every level, narrowest first."""
+        return [score // self.bucket_base**level for level in range(self.bucket_levels)]
+
+    def _move_buckets(self, moves: list) -> None:
+        """Apply (board, expires_at, old score or None, new score) entry moves to the buckets."""
+        deltas = {}
+        for board, expires_at, old, new in moves:
+            key = tuple(board.values())
+            buckets = [(level, bucket, 1) for level, bucket in enumerate(self._buckets(new))]
+            if old is not None:
+                buckets += [(level, bucket, -1) for level, bucket in enumerate(self._buckets(old))]
+            for level, bucket, delta in buckets:
+                entry = deltas.setdefault((key, level, bucket), [board, expires_at, 0])
+                entry[2] += delta
+        # Levels where the old and new score share a bucket cancel out here.
+        operations = [
+            UpdateOne(
+                {**board, "level": level, "bucket": bucket},
+                {"$inc": {"count": delta}, "$set": {"expires_at": expires_at}},
+                upsert=True,
+            )
+            for (_, level, bucket), (board, expires_at, delta) in deltas.items()
+            if delta
+        ]
+        if operations:
+            ScoreBucket._get_collection().bulk_write(operations, ordered=False)
+
+    def rebuild_buckets(self, game_id=None) -> int:
+        """Recount the score buckets from the entries; returns the number of buckets.
+
+        For boards written before buckets existed, after bulk loads that
+        bypass submit_many, or after the bucket levels changed; a full
+        rebuild also recreates the collection's indexes.
+        """
+        match = {} if game_id is None else {"game_id": ObjectId(game_id)}
+        buckets = ScoreBucket._get_collection()
+        if game_id is None:
+            buckets.drop()
+            ScoreBucket.ensure_indexes()
+        else:
+            buckets.delete_many(match)
+        operations = [
+            InsertOne(
+                {
+                    **son["_id"],
+                    "level": level,
+                    "count": son["count"],
+                    "expires_at": son["expires_at"],
+                }
+            )
+            for level in range(self.bucket_levels)
+            for son in self.model._get_collection().aggregate(
+                [
+                    {"$match": match},
+                    {
+                        "$group": {
+                            "_id": {
+                                "game_id": "$game_id",
+                                "period": "$period",
+                                "window_start": "$window_start",
+                                "bucket": {
+                                    "$toLong": {
+                                        "$floor": {
+                                            "$divide": ["$score", self.bucket_base**level]
+                                        }
+                                    }
+                                },
+                            },
+                            "count": {"$sum": 1},
+                            "expires_at": {"$max": "$expires_at"},
+                        }
+                    },
+                ]
+            )
+        ]
+        if operations:
+            buckets.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def get_top(self, game_id, period: ScorePeriod, limit: int) -> list:
+        return list(
+            self.model.objects(**self._board(game_id, period))
+            .order_by(*BOARD_ORDER)
+            .limit(limit)
+        )
+
+    def get_entry(self, game_id, period: ScorePeriod, user_id) -> UserScore | None:
+        return self.model.objects(
+            **self._board(game_id, period), user_id=ObjectId(user_id)
+        ).first()
+
+    def _entry_board(self, entry: UserScore) -> dict:
+        return {
+            "game_id": entry.game_id,
+            "period": entry.period,
+            "window_start": entry.window_start,
+        }
+
+    def _ahead_match(self, entry: UserScore) -> dict:
+        """Raw filter for the entries ranked above entry on its board."""
+        return {
+            "$or": [
+                {"score": {"$gt": entry.score}},
+                {"score": entry.score, "achieved_at": {"$lt": entry.achieved_at}},
+                {
+                    "score": entry.score,
+                    "achieved_at": entry.achieved_at,
+                    "user_id": {"$lt": entry.user_id},
+                },
+            ]
+        }
+
+    def _behind_match(self, entry: UserScore) -> dict:
+        return {
+            "$or": [
+                {"score": {"$lt": entry.score}},
+                {"score": entry.score, "achieved_at": {"$gt": entry.achieved_at}},
+                {
+                    "score": entry.score,
+                    "achieved_at": entry.achieved_at,
+                    "user_id": {"$gt": entry.user_id},
+                },
+            ]
+        }
+
+    def get_rank(self, entry: UserScore) -> int:
+        """1-based rank from the score buckets above the entry plus its ties.
+
+        On each level but the widest, only the buckets sharing the entry's
+        bucket one level up are added, so at most SCORE_BUCKET_BASE buckets
+        per level are read however the scores are distributed. Entries are
+        only counted one by one among ties on the exact same score.
+        """
+        board = self._entry_board(entry)
+        buckets = self._buckets(entry.score)
+        top = len(buckets) - 1
+        ranges = [
+            {
+                "level": level,
+                "bucket": {"$gt": bucket, "$lt": (buckets[level + 1] + 1) * self.bucket_base},
+            }
+            for level, bucket in enumerate(buckets[:top])
+        ]
+        ranges.append({"level": top, "bucket": {"$gt": buckets[top]}})
+        above = next(
+            ScoreBucket._get_collection().aggregate(
+                [
+                    {"$match": {**board, "period": board["period"].value, "$or": ranges}},
+                    {"$group": {"_id": None, "count": {"$sum": "$count"}}},
+                ]
+            ),
+            {"count": 0},
+        )["count"]
+        ties = self.model.objects(
+            **board, score=entry.score, __raw__=self._ahead_match(entry)
+        ).count()
+        return above + ties + 1
+
+    def get_neighbours(self, entry: UserScore, size: int) -> tuple[list, list]:
+        """Up to size entries directly above (best first) and below entry."""
+        board = self._entry_board(entry)
+        above = list(
+            self.model.objects(**board, __raw__=self._ahead_match(entry))
+            .order_by("score", "-achieved_at", "-user_id")
+            .limit(size)
+        )
+        below = list(
+            self.model.objects(**board, __raw__=self._behind_match(entry))
+            .order_by(*BOARD_ORDER)
+            .limit(size)
+        )
+        return above[::-1], below
+
+    def delete_by_game(self, game_id) -> None:
+        self.model.objects(game_id=game_id).delete()
+        ScoreBucket.objects(game_id=game_id).delete()
+
+    def migrate_embedded_scores(self) -> tuple[int, int]:
+        """Move Game.scores entries into the all-time board of the score collection.
+
+        Submissions are best-score upserts, so an interrupted run can simply
+        be started again. The score buckets are rebuilt afterwards.
+        """
+        games = Game._get_collection()
+        migrated_games = migrated_scores = 0
+        for game in games.find({"scores": {"$exists": True}}, {"scores": 1}):
+            operations = []
+            board = {"game_id": game["_id"], "period": ScorePeriod.ALL.value, "window_start": None}
+            for score in game.get("scores") or []:
+                operations.append(
+                    self._submit_operation(
+                        board,
+                        score["user_id"],
+                        score.get("user_nickname"),
+                        score.get("score") or 0,
+                        score.get("created_at") or game["_id"].generation_time,
+                        None,
+                    )
+                )
+            if operations:
+                self.model._get_collection().bulk_write(operations)
+            games.update_one({"_id": game["_id"]}, {"$unset": {"scores": ""}})
+            migrated_games += 1
+            migrated_scores += len(operations)
+        self.rebuild_buckets()
+        return migrated_games, migrated_scores
@@ -1,9 +1,17 @@
 from app.repositories.base_repository import BaseRepository
 from app.models.user import User
+from app.tools.cache import TTLCache
 from mongoengine import Q
 
+user_cache = TTLCache("USER_CACHE", maxsize=4096, ttl=60)
+token_version_cache = TTLCache("TOKEN_VERSION_CACHE", maxsize=10000, ttl=30)
+# User fields copied into access token claims by UserService._create_access_token.
+TOKEN_CLAIM_FIELDS = frozenset({"name", "nickname", "email", "roles"})
+
 
 class UserRepository(BaseRepository[User]):
+    """Reads go to MongoDB; every write also evicts the user from user_cache."""
+
     def __init__(self):
         super().__init__(User)
 
@@ -12,3 +20,87 @@ class UserRepository(BaseRepository[User]):
 
     def get_by_email_or_nickname(self, identifier: str) -> User:
         return User.objects(Q(email=identifier) | Q(nickname=identifier)).first()
+
+    def get_many_by_ids(self, ids) -> dict:
+        return {user.id: user for user in User.objects(id__in=list(ids))}
+
+    def get_token_version(self, user_id) -> int | None:
+        """The user's current token_version, or None if the user is gone.
+
+        Checked on every authenticated request, so it is cached for
+        TOKEN_VERSION_CACHE_TTL seconds; other processes see a bump within
+        that window.
+        """
+        version = token_version_cache.get(str(user_id))
+        if version is None:
+            version = User.objects(id=user_id).scalar("token_version").first()
+            if version is not None:
+                token_version_cache.set(str(user_id), version)
+        return version
+
+    def _revoke_tokens(self, user_id) -> None:
+        User.objects(id=user_id).update_one(inc__token_version=1)
+        token_version_cache.invalidate(str(user_id))
+        user_cache.invalidate(str(user_id))
+
+    def update(self, entity: User) -> User:
+        # Tokens carry these fields, so they are only revoked when one changes.
+        claims_changed = not TOKEN_CLAIM_FIELDS.isdisjoint(entity._changed_fields)
+        entity.save()
+        if claims_changed:
+            self._revoke_tokens(entity.id)
+            entity.reload("token_version")
+        else:
+            user_cache.invalidate(str(entity.id))
+        return entity
+
+    def update_password(self, user_id, password: str) -> None:
+        User.objects(id=user_id).update_one(set__password=password)
+        user_cache.invalidate(str(user_id))
+
+    def add_role(self, user: User, role: str) -> User:
+        user.add_role(role)
+        self._revoke_tokens(user.id)
+        return user
+
+    def remove_role(self, user: User, role: str) -> User:
+        user.remove_role(role)
+        self._revoke_tokens(user.id)
+        return user
+
+    def delete(self, entity: User) -> None:
+        entity.delete()
+        token_version_cache.invalidate(str(entity.id))
+        user_cache.invalidate(str(entity.id))
+
+
+class CachedUserRepository(UserRepository):
+    """UserRepository whose id lookups are served from user_cache.
+
+    For the hot paths that only need a user's id, nickname or roles, such
+    as votes, comments and score submissions. Cached users are shared
+    between requests and must not be modified; load through
+    UserRepository to change a user.
+    """
+
+    def get_by_id(self, id: str) -> User:
+        user = user_cache.get(str(id))
+        if user is None:
+            user = super().get_by_id(id)
+            if user is not None:
+                user_cache.set(str(user.id), user)
+        return user
+
+    def get_many_by_ids(self, ids) -> dict:
+        users, missing = {}, []
+        for id in ids:
+            user = user_cache.get(str(id))
+            if user is None:
+                missing.append(id)
+            else:
+                users[user.id] = user
+        if missing:
+            for id, user in super().get_many_by_ids(missing).items():
+                user_cache.set(str(id), user)
+                users[id] = user
+        return users
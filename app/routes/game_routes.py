@@ -1,20 +1,38 @@
-from flask import request, Blueprint, g
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request, Blueprint, g, current_app
+from flask_jwt_extended import jwt_required
 from flasgger import swag_from
-from app.repositories.user_repository import UserRepository
+from app.repositories.user_repository import CachedUserRepository
 from app.repositories.game_repository import GameRepository
+from app.repositories.game_vote_repository import GameVoteRepository
+from app.repositories.comment_repository import CommentRepository
+from app.repositories.score_repository import ScoreRepository
+from app.repositories.play_repository import PlayRepository
 from app.services.game_service import GameService
-from app.models.game import GamePlatform
+from app.models.game import Game, GamePlatform
+from app.models.game_vote import VoteDirection
 from app.dtos.game import (
     GameInputDTO,
     GameDetailOutputDTO,
+    GameCounterOutputDTO,
     GameThumbnailOutputDTO,
     GamePagingDTO,
+    GameFacetOutputDTO,
     GameChangeLogInputDTO,
     GameChangeLogOutputDTO,
 )
-from app.dtos.comment import CommentInputDto
+from app.dtos.comment import (
+    CommentInputDto,
+    CommentOutputDto,
+    CommentPagingDTO,
+    CommentThreadDTO,
+    CommentCounterOutputDTO,
+)
+from app.dtos.voter import VoterPagingDTO
+from app.tools.principal import current_principal
+from app.tools.conditional import weak_etag, not_modified, with_etag
 from app.tools.response import Response
+from app.tools.gridfs_response import send_grid_file
+from app.tools.upload import stream_upload, discard_uploads
 from app.dtos.response import ResponseDTO
 
 game_routes = Blueprint("game_routes", __name__)
@@ -22,9 +40,20 @@ game_routes = Blueprint("game_routes", __name__)
 
 @game_routes.before_request
 def before_request():
-    g.game_repo = GameRepository()
-    g.user_repo = UserRepository()
-    g.game_service = GameService(g.game_repo, g.user_repo)
+    g.game_repo = GameRepository(current_app.config["GAME_COUNT_ESTIMATED"])
+    g.user_repo = CachedUserRepository()
+    g.game_vote_repo = GameVoteRepository()
+    g.comment_repo = CommentRepository()
+    g.score_repo = ScoreRepository()
+    g.play_repo = PlayRepository()
+    g.game_service = GameService(
+        g.game_repo,
+        g.user_repo,
+        g.game_vote_repo,
+        g.comment_repo,
+        g.score_repo,
+        g.play_repo,
+    )
 
 
 @game_routes.get("/get-game-list")
@@ -58,23 +87,136 @@ def before_request():
                 "required": False,
                 "type": "integer",
             },
+            {
+                "name": "cursor",
+                "in": "query",
+                "required": False,
+                "type": "string",
+                "description": "Send empty for the first page to switch to cursor paging, then next_cursor/prev_cursor",
+                "allowEmptyValue": True,
+            },
+            {
+                "name": "with_count",
+                "in": "query",
+                "required": False,
+                "type": "boolean",
+                "description": "Cursor paging only, also return the total",
+            },
+            {
+                "name": "sort",
+                "in": "query",
+                "required": False,
+                "type": "string",
+                "enum": ["new", "hot", "top"],
+                "default": "new",
+            },
         ],
         "responses": {
             "200": {"description": "get test"},
+            "304": {"description": "Unchanged since the ETag sent in If-None-Match"},
         },
     }
 )
 def get_games_by_page():
-    res: Response = g.game_service.get_game_by_page(
-        request.args.get("current_page"),
-        request.args.get("page_size"),
+    if "cursor" in request.args:
+        res: Response = g.game_service.get_game_by_cursor(
+            request.args.get("cursor"),
+            request.args.get("page_size", type=int),
+            request.args.getlist("tags"),
+            request.args.get("game_engine"),
+            None,
+            request.args.get("with_count", "false").lower() == "true",
+            request.args.get("sort", "new"),
+        )
+    else:
+        res: Response = g.game_service.get_game_by_page(
+            request.args.get("current_page", type=int),
+            request.args.get("page_size", type=int),
+            request.args.getlist("tags"),
+            request.args.get("game_engine"),
+            None,
+            request.args.get("sort", "new"),
+        )
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    page = res.response
+    etag = weak_etag(
+        [(row.id, row.revision) for row in page["game_list"]],
+        sorted((key, value) for key, value in page.items() if key != "game_list"),
+    )
+    return not_modified(etag) or with_etag(
+        (ResponseDTO.convert(res, GamePagingDTO), 200), etag
+    )
+
+
+@game_routes.get("/search")
+@swag_from(
+    {
+        "tags": ["Games"],
+        "parameters": [
+            {"name": "q", "in": "query", "required": True, "type": "string"},
+            {
+                "name": "prefix",
+                "in": "query",
+                "required": False,
+                "type": "boolean",
+                "description": "Match word prefixes, for autocomplete",
+            },
+            {"name": "cursor", "in": "query", "required": False, "type": "string"},
+            {"name": "page_size", "in": "query", "required": False, "type": "integer"},
+        ],
+        "responses": {
+            "200": {"description": "Matching games, best match first"},
+            "404": {"description": "Invalid query"},
+        },
+    }
+)
+def search_games():
+    res: Response = g.game_service.search_games(
+        request.args.get("q"),
+        request.args.get("cursor"),
+        request.args.get("page_size", type=int),
+        request.args.get("prefix", "false").lower() == "true",
+    )
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, GamePagingDTO), 200
+
+
+@game_routes.get("/facets")
+@swag_from(
+    {
+        "tags": ["Games"],
+        "parameters": [
+            {
+                "name": "tags",
+                "in": "query",
+                "required": False,
+                "type": "array",
+                "items": {"type": "string"},
+                "collectionFormat": "multi",
+            },
+            {
+                "name": "game_engine",
+                "in": "query",
+                "required": False,
+                "type": "string",
+            },
+        ],
+        "responses": {
+            "200": {"description": "Tag and game engine counts"},
+        },
+    }
+)
+def get_game_facets():
+    res: Response = g.game_service.get_facets(
         request.args.getlist("tags"),
-        request.args.getlist("game_engine"),
+        request.args.get("game_engine"),
         None,
     )
     if not res.result:
         return ResponseDTO.convert(res), 404
-    return ResponseDTO.convert(res, GamePagingDTO), 200
+    return ResponseDTO.convert(res, GameFacetOutputDTO), 200
 
 
 @game_routes.get("/detail/<game_id>")
@@ -91,15 +233,102 @@ def get_games_by_page():
         ],
         "responses": {
             "200": {"description": "get test"},
+            "304": {"description": "Unchanged since the ETag sent in If-None-Match"},
             "404": {"description": "User not found"},
         },
     }
 )
 def get_game_by_id(game_id):
+    revision: Response = g.game_service.get_game_revision(game_id)
+    if not revision.result:
+        return ResponseDTO.convert(revision), 404
+    etag = weak_etag(game_id, revision.response)
+    cached = not_modified(etag)
+    if cached:
+        return cached
     res: Response = g.game_service.get_game_by_id(game_id)
     if not res.result:
         return ResponseDTO.convert(res), 404
-    return ResponseDTO.convert(res, GameDetailOutputDTO), 200
+    return with_etag((ResponseDTO.convert(res, GameDetailOutputDTO), 200), etag)
+
+
+@game_routes.get("/<game_id>/thumbnail")
+@swag_from(
+    {
+        "tags": ["Games"],
+        "produces": ["image/*"],
+        "parameters": [
+            {
+                "name": "game_id",
+                "in": "path",
+                "required": True,
+                "type": "string",
+            },
+            {
+                "name": "v",
+                "in": "query",
+                "required": False,
+                "type": "string",
+                "description": "Thumbnail version, as given in listing URLs",
+            },
+        ],
+        "responses": {
+            "200": {"description": "Thumbnail image"},
+            "304": {"description": "Not modified"},
+            "404": {"description": "File not found"},
+        },
+    }
+)
+def get_game_thumbnail(game_id):
+    res: Response = g.game_service.get_game_file(game_id, "thumbnail")
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return send_grid_file(
+        res.response,
+        current_app.config["THUMBNAIL_MAX_AGE"],
+        immutable=request.args.get("v") == str(res.response._id),
+    )
+
+
+@game_routes.get("/<game_id>/content")
+@swag_from(
+    {
+        "tags": ["Games"],
+        "produces": ["application/octet-stream"],
+        "parameters": [
+            {
+                "name": "game_id",
+                "in": "path",
+                "required": True,
+                "type": "string",
+            },
+            {
+                "name": "Range",
+                "in": "header",
+                "required": False,
+                "type": "string",
+                "description": "e.g. bytes=0-1048575",
+            },
+        ],
+        "responses": {
+            "200": {"description": "Game content"},
+            "206": {"description": "Partial game content"},
+            "304": {"description": "Not modified"},
+            "404": {"description": "File not found"},
+            "416": {"description": "Range not satisfiable"},
+        },
+    }
+)
+def get_game_content(game_id):
+    res: Response = g.game_service.get_game_file(game_id, "game_content")
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return send_grid_file(
+        res.response,
+        current_app.config["GAME_CONTENT_MAX_AGE"],
+        immutable=request.args.get("v") == str(res.response._id),
+        accept_ranges=True,
+    )
 
 
 @game_routes.post("/")
@@ -171,21 +400,30 @@ def get_game_by_id(game_id):
     }
 )
 def create_game():
-    print(request.files)
+    form, files = stream_upload(
+        {"thumbnail": Game.thumbnail, "game_content": Game.game_content},
+        current_app.config["UPLOAD_LIMITS"],
+        current_app.config["UPLOAD_CHUNK_SIZE"],
+    )
     converted_form = {
-        "publisher_id": request.form.get("publisher_id"),
-        "tags": request.form.getlist("tags"),
-        "title": request.form.get("title"),
-        "description": request.form.get("description"),
-        "embedded_link": request.form.get("embedded_link"),
-        "platform": request.form.get("platform"),
-        "game_engine": request.form.get("game_engine"),
-        "thumbnail": request.files.get("thumbnail"),
-        "game_content": request.files.get("game_content"),
+        "publisher_id": form.get("publisher_id"),
+        "tags": form.getlist("tags"),
+        "title": form.get("title"),
+        "description": form.get("description"),
+        "embedded_link": form.get("embedded_link"),
+        "platform": form.get("platform"),
+        "game_engine": form.get("game_engine"),
+        "thumbnail": files.get("thumbnail"),
+        "game_content": files.get("game_content"),
     }
-    data = GameInputDTO().load(converted_form)
+    try:
+        data = GameInputDTO().load(converted_form)
+    except Exception:
+        discard_uploads(files)
+        raise
     res: Response = g.game_service.create_game(data)
     if not res.result:
+        discard_uploads(files)
         return ResponseDTO.convert(res), 404
     return ResponseDTO.convert(res, GameDetailOutputDTO), 201
 
@@ -269,15 +507,98 @@ def add_log():
 )
 @jwt_required()
 def add_comment():
-    user_id = get_jwt_identity()
     game_json = request.get_json()
     comment_input = CommentInputDto().load(game_json)
     res: Response = g.game_service.add_comment(
-        game_json["game_id"], user_id, comment_input
+        game_json["game_id"], current_principal(), comment_input
     )
     if not res.result:
         return ResponseDTO.convert(res), 404
-    return ResponseDTO.convert(res, GameDetailOutputDTO), 201
+    return ResponseDTO.convert(res, CommentOutputDto), 201
+
+
+@game_routes.get("/<game_id>/comments")
+@swag_from(
+    {
+        "tags": ["Games"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            {"name": "cursor", "in": "query", "required": False, "type": "string"},
+            {"name": "page_size", "in": "query", "required": False, "type": "integer"},
+            {
+                "name": "replies",
+                "in": "query",
+                "required": False,
+                "type": "integer",
+                "description": "Newest replies to include from each thread",
+            },
+        ],
+        "responses": {"200": {"description": "Top-level comments, newest first"}},
+    }
+)
+def get_game_comments(game_id):
+    res: Response = g.game_service.get_comments(
+        game_id,
+        None,
+        request.args.get("cursor"),
+        request.args.get("page_size", type=int),
+        request.args.get("replies", 0, type=int),
+    )
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, CommentPagingDTO), 200
+
+
+@game_routes.get("/<game_id>/comments/<comment_id>/replies")
+@swag_from(
+    {
+        "tags": ["Games"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            {"name": "comment_id", "in": "path", "required": True, "type": "string"},
+            {"name": "cursor", "in": "query", "required": False, "type": "string"},
+            {"name": "page_size", "in": "query", "required": False, "type": "integer"},
+        ],
+        "responses": {"200": {"description": "Replies to a comment, newest first"}},
+    }
+)
+def get_comment_replies(game_id, comment_id):
+    res: Response = g.game_service.get_comments(
+        game_id,
+        comment_id,
+        request.args.get("cursor"),
+        request.args.get("page_size", type=int),
+    )
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, CommentPagingDTO), 200
+
+
+@game_routes.get("/<game_id>/comments/<comment_id>/thread")
+@swag_from(
+    {
+        "tags": ["Games"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            {"name": "comment_id", "in": "path", "required": True, "type": "string"},
+            {"name": "cursor", "in": "query", "required": False, "type": "string"},
+            {"name": "page_size", "in": "query", "required": False, "type": "integer"},
+        ],
+        "responses": {
+            "200": {"description": "A comment and one page of its replies in thread order"}
+        },
+    }
+)
+def get_comment_thread(game_id, comment_id):
+    res: Response = g.game_service.get_comment_thread(
+        game_id,
+        comment_id,
+        request.args.get("cursor"),
+        request.args.get("page_size", type=int),
+    )
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, CommentThreadDTO), 200
 
 
 @game_routes.put("/upvote")
@@ -292,13 +613,12 @@ def add_comment():
 )
 @jwt_required()
 def upvote_game():
-    user_id = get_jwt_identity()
     res: Response = g.game_service.upvote_game(
-        request.args.get("game_id"), user_id
+        request.args.get("game_id"), current_principal()
     )
     if not res.result:
         return ResponseDTO.convert(res), 404
-    return ResponseDTO.convert(res, GameDetailOutputDTO), 200
+    return ResponseDTO.convert(res, GameCounterOutputDTO), 200
 
 
 @game_routes.put("/downvote")
@@ -313,13 +633,47 @@ def upvote_game():
 )
 @jwt_required()
 def downvote_game():
-    user_id = get_jwt_identity()
     res: Response = g.game_service.downvote_game(
-        request.args.get("game_id"), user_id
+        request.args.get("game_id"), current_principal()
+    )
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, GameCounterOutputDTO), 200
+
+
+@game_routes.get("/<game_id>/votes")
+@swag_from(
+    {
+        "tags": ["Games"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            {
+                "name": "direction",
+                "in": "query",
+                "required": False,
+                "type": "string",
+                "enum": ["up", "down"],
+                "default": "up",
+            },
+            {"name": "cursor", "in": "query", "required": False, "type": "string"},
+            {"name": "page_size", "in": "query", "required": False, "type": "integer"},
+        ],
+        "responses": {"200": {"description": "Voters, newest first"}},
+    }
+)
+def get_game_voters(game_id):
+    direction = (
+        VoteDirection.DOWN if request.args.get("direction") == "down" else VoteDirection.UP
+    )
+    res: Response = g.game_service.get_game_voters(
+        game_id,
+        direction,
+        request.args.get("cursor"),
+        request.args.get("page_size", type=int),
     )
     if not res.result:
         return ResponseDTO.convert(res), 404
-    return ResponseDTO.convert(res, GameDetailOutputDTO), 200
+    return ResponseDTO.convert(res, VoterPagingDTO), 200
 
 
 @game_routes.put("/upvote/comment")
@@ -335,15 +689,14 @@ def downvote_game():
 )
 @jwt_required()
 def upvote_comment():
-    user_id = get_jwt_identity()
     res: Response = g.game_service.upvote_game_comment(
-        request.args.get["game_id"],
-        user_id,
-        request.args.get["comment_id"],
+        request.args.get("game_id"),
+        current_principal(),
+        request.args.get("comment_id"),
     )
     if not res.result:
         return ResponseDTO.convert(res), 404
-    return ResponseDTO.convert(res, GameDetailOutputDTO), 200
+    return ResponseDTO.convert(res, CommentCounterOutputDTO), 200
 
 
 @game_routes.put("/downvote/comment")
@@ -359,15 +712,14 @@ def upvote_comment():
 )
 @jwt_required()
 def downvote_comment():
-    user_id = get_jwt_identity()
     res: Response = g.game_service.downvote_game_comment(
-        request.args.get["game_id"],
-        user_id,
-        request.args.get["comment_id"],
+        request.args.get("game_id"),
+        current_principal(),
+        request.args.get("comment_id"),
     )
     if not res.result:
         return ResponseDTO.convert(res), 404
-    return ResponseDTO.convert(res, GameDetailOutputDTO), 200
+    return ResponseDTO.convert(res, CommentCounterOutputDTO), 200
 
 
 @game_routes.delete("/<game_id>")
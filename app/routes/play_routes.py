@@ -0,0 +1,108 @@
+from flask import request, Blueprint, g, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from flasgger import swag_from
+from itsdangerous import URLSafeSerializer
+from app.repositories.game_repository import GameRepository
+from app.repositories.play_repository import PlayRepository
+from app.services.play_service import PlayService
+from app.dtos.play import PlaySessionOutputDTO, PlayStatsOutputDTO
+from app.tools.response import Response
+from app.dtos.response import ResponseDTO
+
+play_routes = Blueprint("play_routes", __name__)
+
+MAX_STATS_DAYS = 90
+
+PLAYER_PARAMETER = {
+    "name": "player_id",
+    "in": "query",
+    "required": False,
+    "type": "string",
+    "description": "Anonymous player key; ignored when a token is sent",
+}
+
+
+def _player() -> str:
+    """Who is playing, for unique-player counts: the user, else a client key, else the address."""
+    return str(
+        get_jwt_identity() or request.args.get("player_id") or request.remote_addr
+    )
+
+
+@play_routes.before_request
+def before_request():
+    g.game_repo = GameRepository()
+    g.play_repo = PlayRepository()
+    g.play_service = PlayService(
+        g.game_repo,
+        g.play_repo,
+        URLSafeSerializer(current_app.config["SECRET_KEY"], salt="play-session"),
+    )
+
+
+@play_routes.post("/<game_id>/play/start")
+@swag_from(
+    {
+        "tags": ["Plays"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            PLAYER_PARAMETER,
+        ],
+        "responses": {"201": {"description": "Session id to send when the session ends"}},
+    }
+)
+@jwt_required(optional=True)
+def start_session(game_id):
+    res: Response = g.play_service.start_session(game_id, _player())
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, PlaySessionOutputDTO), 201
+
+
+@play_routes.post("/<game_id>/play/end")
+@swag_from(
+    {
+        "tags": ["Plays"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            {
+                "name": "session_id",
+                "in": "query",
+                "required": True,
+                "type": "string",
+                "description": "Signed session id returned by play/start",
+            },
+        ],
+        "responses": {"200": {"description": "Session recorded"}},
+    }
+)
+def end_session(game_id):
+    res: Response = g.play_service.end_session(
+        game_id,
+        request.args.get("session_id"),
+        current_app.config["PLAY_SESSION_MAX_DURATION"],
+    )
+    if not res.result:
+        return ResponseDTO.convert(res), 400
+    return ResponseDTO.convert(res, PlaySessionOutputDTO), 200
+
+
+@play_routes.get("/<game_id>/play-stats")
+@swag_from(
+    {
+        "tags": ["Plays"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            {"name": "days", "in": "query", "required": False, "type": "integer"},
+        ],
+        "responses": {
+            "200": {"description": "Daily sessions, average length and unique players"}
+        },
+    }
+)
+def get_play_stats(game_id):
+    days = min(max(request.args.get("days", 7, type=int), 1), MAX_STATS_DAYS)
+    res: Response = g.play_service.get_play_stats(game_id, days)
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, PlayStatsOutputDTO), 200
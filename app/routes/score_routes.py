@@ -0,0 +1,162 @@
+from flask import request, Blueprint, g, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from flasgger import swag_from
+from app.repositories.game_repository import GameRepository
+from app.repositories.user_repository import CachedUserRepository
+from app.repositories.score_repository import ScoreRepository
+from app.services.score_service import ScoreService
+from app.models.user_score import ScorePeriod
+from app.dtos.score import (
+    ScoreInputDTO,
+    ScoreBatchOutputDTO,
+    LeaderboardOutputDTO,
+    ScoreRankOutputDTO,
+)
+from app.tools.principal import current_principal
+from app.tools.response import Response
+from app.dtos.response import ResponseDTO
+
+score_routes = Blueprint("score_routes", __name__)
+
+MAX_LEADERBOARD_SIZE = 100
+MAX_NEIGHBOURS = 25
+
+PERIOD_PARAMETER = {
+    "name": "period",
+    "in": "query",
+    "required": False,
+    "type": "string",
+    "enum": [period.value for period in ScorePeriod],
+    "default": ScorePeriod.ALL.value,
+}
+
+
+def _period() -> ScorePeriod:
+    try:
+        return ScorePeriod(request.args.get("period", ScorePeriod.ALL.value))
+    except ValueError:
+        return ScorePeriod.ALL
+
+
+@score_routes.before_request
+def before_request():
+    g.score_repo = ScoreRepository()
+    g.game_repo = GameRepository()
+    g.user_repo = CachedUserRepository()
+    g.score_service = ScoreService(g.score_repo, g.game_repo, g.user_repo)
+
+
+@score_routes.post("/<game_id>/scores")
+@swag_from(
+    {
+        "tags": ["Scores"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            {
+                "name": "score",
+                "in": "body",
+                "required": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {"score": {"type": "integer", "required": True}},
+                },
+            },
+        ],
+        "responses": {"201": {"description": "Score recorded, with the all-time rank"}},
+    }
+)
+@jwt_required()
+def submit_score(game_id):
+    score_input = ScoreInputDTO().load(request.get_json())
+    res: Response = g.score_service.submit_score(game_id, current_principal(), score_input)
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, ScoreRankOutputDTO), 201
+
+
+@score_routes.post("/scores/batch")
+@swag_from(
+    {
+        "tags": ["Scores"],
+        "parameters": [
+            {
+                "name": "scores",
+                "in": "body",
+                "required": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "scores": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "game_id": {"type": "string", "required": True},
+                                    "user_id": {"type": "string", "required": False},
+                                    "score": {"type": "integer", "required": True},
+                                },
+                            },
+                        }
+                    },
+                },
+            }
+        ],
+        "responses": {
+            "200": {"description": "Per-record results, in request order"},
+            "400": {"description": "Not a list of scores, or too many"},
+        },
+    }
+)
+@jwt_required()
+def submit_scores():
+    items = (request.get_json(silent=True) or {}).get("scores")
+    max_size = current_app.config["SCORE_BATCH_MAX_SIZE"]
+    if not isinstance(items, list) or len(items) > max_size:
+        res = Response.fail(f"scores must be a list of at most {max_size} records")
+        return ResponseDTO.convert(res), 400
+    res: Response = g.score_service.submit_scores(current_principal(), items)
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, ScoreBatchOutputDTO), 200
+
+
+@score_routes.get("/<game_id>/leaderboard")
+@swag_from(
+    {
+        "tags": ["Scores"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            PERIOD_PARAMETER,
+            {"name": "limit", "in": "query", "required": False, "type": "integer"},
+        ],
+        "responses": {"200": {"description": "Best scores, highest first"}},
+    }
+)
+def get_leaderboard(game_id):
+    limit = min(request.args.get("limit", 10, type=int), MAX_LEADERBOARD_SIZE)
+    res: Response = g.score_service.get_leaderboard(game_id, _period(), max(limit, 1))
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, LeaderboardOutputDTO), 200
+
+
+@score_routes.get("/<game_id>/leaderboard/me")
+@swag_from(
+    {
+        "tags": ["Scores"],
+        "parameters": [
+            {"name": "game_id", "in": "path", "required": True, "type": "string"},
+            PERIOD_PARAMETER,
+            {"name": "neighbours", "in": "query", "required": False, "type": "integer"},
+        ],
+        "responses": {"200": {"description": "The caller's rank and the scores around it"}},
+    }
+)
+@jwt_required()
+def get_my_rank(game_id):
+    user_id = get_jwt_identity()
+    neighbours = min(request.args.get("neighbours", 5, type=int), MAX_NEIGHBOURS)
+    res: Response = g.score_service.get_rank(game_id, user_id, _period(), max(neighbours, 0))
+    if not res.result:
+        return ResponseDTO.convert(res), 404
+    return ResponseDTO.convert(res, ScoreRankOutputDTO), 200
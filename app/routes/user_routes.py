@@ -15,9 +15,9 @@ user_routes = Blueprint("user_routes", __name__)
 @user_routes.before_request
 def before_request():
     g.user_repo = UserRepository()
-    from app import bcrypt
+    from app import password_hasher
 
-    g.user_service = UserService(g.user_repo, bcrypt)
+    g.user_service = UserService(g.user_repo, password_hasher)
 
 
 @user_routes.get("/test-jwt")
@@ -93,6 +93,7 @@ def get_user_by_id(id):
         "responses": {
             "200": {"description": "get test"},
             "404": {"description": "User not found"},
+            "503": {"description": "Too many sign-ins in progress, retry shortly"},
         },
     }
 )
@@ -161,6 +162,7 @@ def login():
                 },
             },
             "400": {"description": "Invalid data"},
+            "503": {"description": "Too many sign-ins in progress, retry shortly"},
         },
     }
 )
@@ -213,7 +215,7 @@ def update_user():
     )
     if not res.result:
         return ResponseDTO.convert(res), 404
-    return ResponseDTO.convert(res, UserOutputDTO), 200
+    return jsonify(res.response)
 
 
 @user_routes.post("/add-roles")
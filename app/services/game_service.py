@@ -1,20 +1,38 @@
 from app.repositories.user_repository import UserRepository
 from app.repositories.game_repository import GameRepository
+from app.repositories.game_vote_repository import GameVoteRepository
+from app.repositories.comment_repository import CommentRepository
+from app.repositories.score_repository import ScoreRepository
+from app.repositories.play_repository import PlayRepository
 from app.dtos.game import GameInputDTO,GameChangeLogInputDTO
 from app.models.game import Game, GameChangeLog
 from app.models.comment import Comment
+from app.models.game_vote import VoteDirection
 from typing import List
 from bson import ObjectId
 from datetime import datetime
 from app.dtos.comment import CommentInputDto
+from app.tools.principal import Principal
 from app.tools.response import Response
 from app.tools.wrapper.handle_response import handle_response
 
 
 class GameService:
-    def __init__(self, game_repo: GameRepository, user_repo: UserRepository):
+    def __init__(
+        self,
+        game_repo: GameRepository,
+        user_repo: UserRepository,
+        game_vote_repo: GameVoteRepository,
+        comment_repo: CommentRepository,
+        score_repo: ScoreRepository,
+        play_repo: PlayRepository,
+    ):
         self.game_repo = game_repo
         self.user_repo = user_repo
+        self.game_vote_repo = game_vote_repo
+        self.comment_repo = comment_repo
+        self.score_repo = score_repo
+        self.play_repo = play_repo
 
     @handle_response
     def get_game_by_page(
@@ -24,9 +42,10 @@ class GameService:
         tags: List[str] | None,
         game_engine: str,
         created_date: datetime | None,
+        sort: str = "new",
     ):
         game_list, current_page, max_page = self.game_repo.get_by_filter(
-            cur_page, page_size, tags, game_engine, created_date
+            cur_page, page_size, tags, game_engine, created_date, sort
         )
         return Response.success(
             response={
@@ -36,15 +55,89 @@ class GameService:
             }
         )
 
+    @handle_response
+    def get_game_by_cursor(
+        self,
+        cursor: str | None,
+        page_size: int,
+        tags: List[str] | None,
+        game_engine: str,
+        created_date: datetime | None,
+        with_count: bool = False,
+        sort: str = "new",
+    ):
+        game_list, next_cursor, prev_cursor, total = self.game_repo.get_by_cursor(
+            cursor, page_size, tags, game_engine, created_date, with_count, sort
+        )
+        return Response.success(
+            response={
+                "game_list": game_list,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+                "total": total,
+            }
+        )
+
+    @handle_response
+    def search_games(self, query: str, cursor: str | None, page_size: int, prefix: bool):
+        if not query or not query.strip():
+            raise Exception("Search query is required")
+        game_list, next_cursor, prev_cursor = self.game_repo.search(
+            query, cursor, page_size, prefix
+        )
+        return Response.success(
+            response={
+                "game_list": game_list,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            }
+        )
+
+    @handle_response
+    def get_facets(
+        self,
+        tags: List[str] | None,
+        game_engine: str,
+        created_date: datetime | None,
+    ):
+        facets = self.game_repo.get_facets(tags, game_engine, created_date)
+        return Response.success(
+            response={
+                name: [
+                    {"value": value, "count": count}
+                    for value, count in sorted(
+                        counts.items(), key=lambda item: (-item[1], item[0])
+                    )
+                ]
+                for name, counts in facets.items()
+            }
+        )
+
     @handle_response
     def get_games(self):
         res = self.game_repo.get_all()
         return Response.success(response=res)
 
     @handle_response
-    def get_game_by_id(self, id):
-        games = self.game_repo.get_by_id(id)
-        return Response.success(response=games)
+    def get_game_by_id(self, id, comment_page_size: int = 10):
+        game = self.game_repo.get_by_id(id)
+        if game:
+            game.comments = self._comment_page(game.id, None, None, comment_page_size)
+        return Response.success(response=game)
+
+    @handle_response
+    def get_game_revision(self, id) -> int:
+        revision = self.game_repo.get_revision(id)
+        if revision is None:
+            raise Exception("Game not found")
+        return revision
+
+    @handle_response
+    def get_game_file(self, id, field):
+        grid_out = self.game_repo.get_file(id, field)
+        if not grid_out:
+            raise Exception("File not found")
+        return Response.success(response=grid_out)
 
     @handle_response
     def create_game(self, game_input: GameInputDTO) -> Game:
@@ -57,26 +150,79 @@ class GameService:
             description=game_input["description"],
             embedded_link=game_input["embedded_link"],
             platform=game_input["platform"],
-            publisher=user,
+            publisher_id=user.id,
             game_engine=game_input["game_engine"].capitalize(),
             thumbnail=game_input["thumbnail"],
             game_content=game_input["game_content"],
         )
-        game.save()
+        self.game_repo.add(game)
         return Response.success("Created successfully", game)
 
     @handle_response
-    def add_comment(self, game_id, user_id, comment_input: CommentInputDto):
+    def add_comment(self, game_id, user: Principal, comment_input: CommentInputDto):
         game = self.game_repo.get_by_id(game_id)
         if not game:
             raise Exception("Game not found")
-        user = self.user_repo.get_by_id(user_id)
-        if not user:
-            raise Exception("User not found")
-        if len(game.comments.filter(user_id=user_id)) > 1:
+        if self.comment_repo.count_by_user(game.id, user.id) > 1:
             raise Exception("You have reached limit")
-        game.add_comment(comment_input.get('parent_id',None),comment_input["content"],user)
-        return Response.success("Added successfully", game)
+        comment = Comment(
+            game_id=game.id,
+            content=comment_input["content"],
+            user_id=user.id,
+            nickname=user.nickname,
+            email=user.email,
+        )
+        parent = None
+        parent_id = comment_input.get("parent_id", None)
+        if parent_id:
+            parent = self.comment_repo.get_by_id(parent_id)
+            if not parent or parent.game_id != game.id:
+                raise Exception("Parent comment not found")
+        self.comment_repo.add(comment, parent)
+        return Response.success("Added successfully", comment)
+
+    def _comment_page(self, game_id, parent_id, cursor, page_size, replies_per_root=0):
+        comments, next_cursor, prev_cursor = self.comment_repo.get_page(
+            game_id, parent_id, cursor, page_size
+        )
+        if not parent_id and replies_per_root:
+            latest = self.comment_repo.get_latest_replies(
+                ObjectId(game_id), [comment.id for comment in comments], replies_per_root
+            )
+            for comment in comments:
+                comment.replies = latest.get(comment.id, [])
+        return {
+            "comments": comments,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+    @handle_response
+    def get_comments(
+        self, game_id, parent_id, cursor: str | None, page_size: int, replies_per_root: int = 0
+    ):
+        if parent_id:
+            parent = self.comment_repo.get_by_id(parent_id)
+            if not parent or parent.game_id != ObjectId(game_id):
+                raise Exception("Comment not found")
+            parent_id = parent.id
+        return Response.success(
+            response=self._comment_page(game_id, parent_id, cursor, page_size, replies_per_root)
+        )
+
+    @handle_response
+    def get_comment_thread(self, game_id, comment_id, cursor: str | None, page_size: int):
+        comment = self.comment_repo.get_by_id(comment_id)
+        if not comment or comment.game_id != ObjectId(game_id):
+            raise Exception("Comment not found")
+        replies, next_cursor = self.comment_repo.get_subtree(comment, cursor, page_size)
+        return Response.success(
+            response={
+                "comment": comment,
+                "comments": replies,
+                "next_cursor": next_cursor,
+            }
+        )
 
     @handle_response
     def add_log(self, game_id: str, game_log: GameChangeLogInputDTO):
@@ -85,163 +231,102 @@ class GameService:
             raise Exception("Game not found")
         major, minor, patch = map(int, game_log['version'].split("."))
         game.add_change_log(major,minor,patch,game_log['log'])
+        self.game_repo.bump_revision(game.id)
         return game
 
     @handle_response
     def delete_comment(self, game_id, user_id, comment_id):
-        game = self.game_repo.get_by_id(game_id)
-        if not game:
-            raise Exception("Game not found")
-        comment = game.comments.filter(id=comment_id).first()
-        if not comment:
+        comment = self.comment_repo.get_by_id(comment_id)
+        if not comment or comment.game_id != ObjectId(game_id):
             raise Exception("Comment not found")
         elif comment.user_id != ObjectId(user_id):
             raise Exception("Not owner")
-        game.comments = [
-            comment for comment in game.comments if comment.id != ObjectId(comment_id)
-        ]
-        game.save()
+        self.comment_repo.delete(comment)
         return Response.success("Removed successfully")
 
     # region Game Vote
-    def _upvote(self, game, user):
-        game.update(
-            inc__upvote=1,
-            add_to_set__upvote_list={
-                "user_id": user.id,
-                "user_nickname": user.nickname,
-            },
-        )
+    VOTE_COUNTERS = {VoteDirection.UP: "upvote", VoteDirection.DOWN: "downvote"}
 
-    def _remove_upvote(self, game, user):
-        filtered_upvote_list = [
-            voter for voter in game.upvote_list if voter.user_id != user.id
-        ]
-        game.update(
-            __raw__={"$inc": {"upvote": -1}},
-            set__upvote_list=filtered_upvote_list,
-        )
+    def _vote(self, game_id, user: Principal, direction: VoteDirection):
+        game_id = ObjectId(game_id)
 
-    def _downvote(self, game, user):
-        game.update(
-            inc__downvote=1,
-            add_to_set__downvote_list={
-                "user_id": user.id,
-                "user_nickname": user.nickname,
-            },
-        )
+        def toggle(session):
+            previous, current = self.game_vote_repo.toggle(
+                game_id, user.id, user.nickname, direction, session
+            )
+            inc = {}
+            if previous:
+                inc[self.VOTE_COUNTERS[previous]] = -1
+            if current:
+                inc[self.VOTE_COUNTERS[current]] = 1
+            counts = self.game_repo.increment_counters(game_id, inc, session)
+            if not counts:
+                # Aborts the transaction, so the vote record is not kept either.
+                raise Exception("Game not found")
+            return current, counts
 
-    def _remove_downvote(self, game, user):
-        filtered_downvote_list = [
-            voter for voter in game.downvote_list if voter.user_id != user.id
-        ]
-        game.update(
-            __raw__={"$inc": {"downvote": -1}},
-            set__downvote_list=filtered_downvote_list,
-        )
+        current, counts = self.game_vote_repo.run_in_transaction(toggle)
+        return {
+            "id": game_id,
+            "upvote": counts["upvote"],
+            "downvote": counts["downvote"],
+            "played_count": counts["played_count"],
+            "vote": current.name.lower() if current else None,
+        }
 
     @handle_response
-    def upvote_game(self, game_id, user_id):
-        game = self.game_repo.get_by_id(game_id)
-        user = self.user_repo.get_by_id(user_id)
-        if not user:
-            raise Exception("User not found")
-        if not game:
-            raise Exception("Game not found")
-        if game.upvote_list.filter(user_id=user_id):
-            self._remove_upvote(game, user)
-        else:
-            if game.downvote_list.filter(user_id=user_id):
-                self._remove_downvote(game, user)
-            self._upvote(game, user)
-        game = self.game_repo.get_by_id(game_id)
-        return Response.success("Action completed", game)
+    def upvote_game(self, game_id, user: Principal):
+        return Response.success("Action completed", self._vote(game_id, user, VoteDirection.UP))
 
     @handle_response
-    def downvote_game(self, game_id, user_id):
-        game = self.game_repo.get_by_id(game_id)
-        user = self.user_repo.get_by_id(user_id)
-        if not user:
-            raise Exception("User not found")
-        if not game:
-            raise Exception("Game not found")
-        if game.downvote_list.filter(user_id=user_id):
-            self._remove_downvote(game, user)
-        else:
-            if game.upvote_list.filter(user_id=user_id):
-                self._remove_upvote(game, user)
-            self._downvote(game, user)
-        game = self.game_repo.get_by_id(game_id)
-        return Response.success("Action completed", game)
-
-    # endregion
+    def downvote_game(self, game_id, user: Principal):
+        return Response.success("Action completed", self._vote(game_id, user, VoteDirection.DOWN))
 
-    # region Comment Vote
-    def _upvote_comment(self, comment, user):
-        comment.upvote += 1
-        comment.upvote_list.append(
-            {
-                "user_id": user.id,
-                "user_nickname": user.nickname,
-            }
+    @handle_response
+    def get_game_voters(self, game_id, direction: VoteDirection, cursor, page_size):
+        voters, next_cursor, prev_cursor = self.game_vote_repo.get_voters(
+            game_id, direction, cursor, page_size
         )
-
-    def _downvote_comment(self, comment, user):
-        comment.downvote += 1
-        comment.downvote_list.append(
-            {
-                "user_id": user.id,
-                "user_nickname": user.nickname,
+        return Response.success(
+            response={
+                "voters": voters,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
             }
         )
 
-    def _remove_upvote_comment(self, comment, user):
-        comment.upvote -= 1
-        voter_list = [
-            voter for voter in comment.upvote_list if voter.user_id != user.id
-        ]
-        comment.upvote_list = voter_list
+    # endregion
 
-    def _remove_downvote_comment(self, comment, user):
-        comment.downvote -= 1
-        voter_list = [
-            voter for voter in comment.downvote_list if voter.user_id != user.id
-        ]
-        comment.downvote_list = voter_list
+    # region Comment Vote
+    def _vote_comment(self, game_id, user: Principal, comment_id, direction: VoteDirection):
+        result = self.comment_repo.vote(
+            game_id, comment_id, user.id, user.nickname, direction
+        )
+        if not result:
+            raise Exception("Comment not found")
+        # The detail page embeds the first comments with their counts.
+        self.game_repo.bump_revision(game_id)
+        current, comment = result
+        return {
+            "id": comment["_id"],
+            "upvote": comment["upvote"],
+            "downvote": comment["downvote"],
+            "vote": current.name.lower() if current else None,
+        }
 
     @handle_response
-    def upvote_game_comment(self, game_id, user_id, comment_id):
-        game = self.game_repo.get_by_id(game_id)
-        if not game:
-            raise Exception("Game not found")
-        user = self.user_repo.get_by_id(user_id)
-        if not user:
-            raise Exception("User not found")
-        comment = game.comments.filter(id=ObjectId(comment_id)).first()
-        if not comment:
-            raise Exception("Comment not found")
-        if comment.downvote_list.filter(user_id=user_id):
-            self._remove_downvote_comment(comment, user)
-        self._upvote_comment(comment, user)
-        game.save()
-        return Response.success("Upvote successfully", game)
+    def upvote_game_comment(self, game_id, user: Principal, comment_id):
+        return Response.success(
+            "Action completed",
+            self._vote_comment(game_id, user, comment_id, VoteDirection.UP),
+        )
 
     @handle_response
-    def downvote_game_comment(self, game_id, user_id, comment_id):
-        game = self.game_repo.get_by_id(game_id)
-        if not game:
-            raise Exception("Game not found")
-        user = self.user_repo.get_by_id(user_id)
-        if not user:
-            raise Exception("User not found")
-        comment = game.comments.filter(id=ObjectId(comment_id)).first()
-        if not comment:
-            raise Exception("Comment not found")
-        if comment.upvote_list.filter(user_id=user_id):
-            self._remove_upvote_comment(comment, user)
-        self._downvote_comment(comment, user)
-        game.save()
-        return Response.success("Downvote successfully", game)
+    def downvote_game_comment(self, game_id, user: Principal, comment_id):
+        return Response.success(
+            "Action completed",
+            self._vote_comment(game_id, user, comment_id, VoteDirection.DOWN),
+        )
 
     # endregion
 
@@ -256,5 +341,9 @@ class GameService:
         if game.game_content:
             game.game_content.delete()
             game.save()
+        self.game_vote_repo.delete_by_game(game.id)
+        self.comment_repo.delete_by_game(game.id)
+        self.score_repo.delete_by_game(game.id)
+        self.play_repo.delete_by_game(game.id)
         self.game_repo.delete(game)
         return Response.success("Delete successful")
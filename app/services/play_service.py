@@ -0,0 +1,79 @@
+from app.repositories.game_repository import GameRepository
+from app.repositories.play_repository import PlayRepository
+from app.tools import hyperloglog
+from app.tools.response import Response
+from app.tools.wrapper.handle_response import handle_response
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+from itsdangerous import BadSignature, URLSafeSerializer
+
+
+class PlayService:
+    def __init__(
+        self,
+        game_repo: GameRepository,
+        play_repo: PlayRepository,
+        session_signer: URLSafeSerializer,
+    ):
+        self.game_repo = game_repo
+        self.play_repo = play_repo
+        # Session ids handed to clients are signed together with the game and
+        # player, so an end can only close a session that was started.
+        self.session_signer = session_signer
+
+    @handle_response
+    def start_session(self, game_id, player: str):
+        counts = self.game_repo.increment_counters(game_id, {"played_count": 1})
+        if not counts:
+            raise Exception("Game not found")
+        session_id = ObjectId()
+        self.play_repo.record_start(game_id, player, session_id.generation_time)
+        return Response.success(
+            "Session started",
+            {
+                "session_id": self.session_signer.dumps([str(session_id), str(game_id), player]),
+                "played_count": counts["played_count"],
+            },
+        )
+
+    @handle_response
+    def end_session(self, game_id, token: str, max_duration: int):
+        try:
+            session_id, session_game_id, player = self.session_signer.loads(token or "")
+        except (BadSignature, ValueError):
+            raise Exception("Invalid session")
+        if session_game_id != str(game_id):
+            raise Exception("Invalid session")
+        if self.game_repo.get_revision(game_id) is None:
+            raise Exception("Game not found")
+        session_id = ObjectId(session_id)
+        now = datetime.now(timezone.utc)
+        if not timedelta(0) <= now - session_id.generation_time <= timedelta(seconds=max_duration):
+            raise Exception("Session expired")
+        duration = self.play_repo.record_end(session_id, game_id, player, now)
+        return Response.success("Session ended", {"session_id": token, "duration": duration})
+
+    @handle_response
+    def get_play_stats(self, game_id, days: int):
+        since = datetime.now(timezone.utc) - timedelta(days=days - 1)
+        rows = self.play_repo.get_stats(game_id, since)
+
+        def summary(stats, players):
+            completed = sum(row.completed for row in stats)
+            return {
+                "sessions": sum(row.sessions for row in stats),
+                "completed": completed,
+                "avg_session_seconds": (
+                    sum(row.total_duration for row in stats) / completed if completed else 0
+                ),
+                "unique_players": hyperloglog.estimate(players),
+            }
+
+        return Response.success(
+            response={
+                "days": [
+                    {"day": row.day.date(), **summary([row], row.players)} for row in rows
+                ],
+                "total": summary(rows, hyperloglog.merge(row.players for row in rows)),
+            }
+        )
@@ -0,0 +1,125 @@
+from app.repositories.game_repository import GameRepository
+from app.repositories.user_repository import UserRepository
+from app.repositories.score_repository import ScoreRepository
+from app.dtos.score import ScoreInputDTO, ScoreBatchItemInputDTO
+from app.models.user import UserRole
+from app.models.user_score import ScorePeriod
+from bson import ObjectId
+from marshmallow import ValidationError
+from app.tools.principal import Principal
+from app.tools.response import Response
+from app.tools.wrapper.handle_response import handle_response
+
+
+class ScoreService:
+    def __init__(
+        self,
+        score_repo: ScoreRepository,
+        game_repo: GameRepository,
+        user_repo: UserRepository,
+    ):
+        self.score_repo = score_repo
+        self.game_repo = game_repo
+        self.user_repo = user_repo
+
+    def _ranked(self, entries, first_rank: int) -> list:
+        return [
+            {
+                "rank": first_rank + index,
+                "user_id": entry.user_id,
+                "user_nickname": entry.user_nickname,
+                "score": entry.score,
+                "achieved_at": entry.achieved_at,
+            }
+            for index, entry in enumerate(entries)
+        ]
+
+    @handle_response
+    def submit_score(self, game_id, user: Principal, score_input: ScoreInputDTO):
+        if not self.game_repo.exists(game_id):
+            raise Exception("Game not found")
+        self.score_repo.submit(game_id, user.id, user.nickname, score_input["score"])
+        return self._get_rank(game_id, user.id, ScorePeriod.ALL, 0)
+
+    @handle_response
+    def submit_scores(self, caller: Principal, items: list):
+        """Validate a batch of score records in one pass and write the valid ones together.
+
+        Records default to the caller; only admins may submit for other
+        users. Several records for the same game and user collapse into the
+        best one before anything is written.
+        """
+        results = [{"index": index, "status": "ok"} for index in range(len(items))]
+        schema = ScoreBatchItemInputDTO()
+        records = {}
+        for index, item in enumerate(items):
+            try:
+                record = schema.load(item if isinstance(item, dict) else {})
+            except ValidationError as error:
+                results[index].update(status="invalid", errors=error.messages)
+                continue
+            records[index] = (
+                ObjectId(record["game_id"]),
+                ObjectId(record.get("user_id", caller.id)),
+                record["score"],
+            )
+
+        game_ids = self.game_repo.get_existing_ids({record[0] for record in records.values()})
+        users = {caller.id: caller}
+        other_ids = {record[1] for record in records.values()} - {caller.id}
+        if other_ids and UserRole.ADMIN in caller.roles:
+            users.update(self.user_repo.get_many_by_ids(other_ids))
+        groups = {}
+        for index, (game_id, record_user_id, _) in records.items():
+            if game_id not in game_ids:
+                results[index].update(status="invalid", message="Game not found")
+            elif record_user_id not in users:
+                results[index].update(status="invalid", message="User not found or not allowed")
+            else:
+                groups.setdefault((game_id, record_user_id), []).append(index)
+
+        groups = list(groups.values())
+        writes = []
+        for group in groups:
+            game_id, record_user_id, _ = records[group[0]]
+            score = max(records[index][2] for index in group)
+            writes.append((game_id, record_user_id, users[record_user_id].nickname, score))
+        for position in self.score_repo.submit_many(writes):
+            for index in groups[position]:
+                results[index].update(status="failed", message="Could not store score")
+        rejected = sum(1 for result in results if result["status"] != "ok")
+        return Response.success(
+            response={
+                "accepted": len(results) - rejected,
+                "rejected": rejected,
+                "results": results,
+            }
+        )
+
+    @handle_response
+    def get_leaderboard(self, game_id, period: ScorePeriod, limit: int):
+        entries = self.score_repo.get_top(game_id, period, limit)
+        return Response.success(
+            response={"period": period.value, "scores": self._ranked(entries, 1)}
+        )
+
+    def _get_rank(self, game_id, user_id, period: ScorePeriod, neighbours: int):
+        entry = self.score_repo.get_entry(game_id, period, user_id)
+        if not entry:
+            raise Exception("No score on this leaderboard")
+        rank = self.score_repo.get_rank(entry)
+        above, below = (
+            self.score_repo.get_neighbours(entry, neighbours) if neighbours else ([], [])
+        )
+        return Response.success(
+            response={
+                "period": period.value,
+                "entry": self._ranked([entry], rank)[0],
+                "above": self._ranked(above, rank - len(above)),
+                "below": self._ranked(below, rank + 1),
+            }
+        )
+
+    @handle_response
+    def get_rank(self, game_id, user_id, period: ScorePeriod, neighbours: int):
+        return self._get_rank(game_id, user_id, period, neighbours)
@@ -2,20 +2,20 @@ import re
 from typing import List
 from app.repositories.user_repository import UserRepository
 from app.models.user import User
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
 )
+from app.tools.password_hasher import PasswordHasher
 from app.tools.response import Response
 from app.tools.wrapper.handle_response import handle_response
 from datetime import datetime, timezone, timedelta
 
 
 class UserService:
-    def __init__(self, user_repo: UserRepository, bcrypt: Bcrypt):
+    def __init__(self, user_repo: UserRepository, password_hasher: PasswordHasher):
         self.user_repo = user_repo
-        self.bcrypt: Bcrypt = bcrypt
+        self.password_hasher: PasswordHasher = password_hasher
 
     @handle_response
     def get_user_by_id(self, id):
@@ -56,8 +56,7 @@ class UserService:
         user = self.user_repo.get_by_id(user_id)
         if not user:
             raise Exception("User not found")
-        user.add_role(role)
-        return user
+        return self.user_repo.add_role(user, role)
     
     @handle_response
     def delete_role(
@@ -66,24 +65,27 @@ class UserService:
         user = self.user_repo.get_by_id(user_id)
         if not user:
             raise Exception("User not found")
-        user.remove_role(role)
-        return user
+        return self.user_repo.remove_role(user, role)
 
     @handle_response
-    def update_user(self, id: str, name: str, nickname: str, password: str) -> User:
+    def update_user(self, id: str, name: str, nickname: str, password: str):
         user = self.user_repo.get_by_id(id)
         if not self._check_password(user.password, password):
             raise Exception("Incorrect password")
         user.name = name if name else user.name
         user.nickname = nickname if nickname else user.nickname
-        self.user_repo.update(user)
-        return None
+        # A changed name or nickname revokes the caller's token, so a fresh one is returned.
+        user = self.user_repo.update(user)
+        return self._create_access_token(user)
 
     @handle_response
     def login(self, identifier: str, password: str):
         user = self.user_repo.get_by_email_or_nickname(identifier)
         if not user or not self._check_password(user.password, password):
             raise Exception("Incorrect email, nickname or password")
+        upgraded = self.password_hasher.rehash(user.password, password)
+        if upgraded:
+            self.user_repo.update_password(user.id, upgraded)
         return self._create_access_token(user)
 
 
@@ -92,13 +94,16 @@ class UserService:
             "id": user.id,
             "email": user.email,
             "name": user.name,
+            "nickname": user.nickname,
+            "roles": [role.value for role in user.roles],
+            "token_version": user.token_version or 0,
             "exp_date": (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat(),
         }
         token = create_access_token(identity=user.id, additional_claims=claims)
         return {"access_token": token}
 
     def _hash_password(self, password):
-        return self.bcrypt.generate_password_hash(password).decode("utf-8")
+        return self.password_hasher.hash(password)
 
     def _check_password(self, hashed, password):
-        return self.bcrypt.check_password_hash(hashed, password)
+        return self.password_hasher.check(hashed, password)
@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after ttl seconds.
+
+    Like the Flask extensions it is created at import time and configured in
+    init_app from <config_prefix>_TTL and <config_prefix>_MAXSIZE.
+    """
+
+    def __init__(self, config_prefix: str, maxsize: int = 1024, ttl: float = 60):
+        self.config_prefix = config_prefix
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.get(f"{self.config_prefix}_MAXSIZE", self.maxsize)
+        self.ttl = app.config.get(f"{self.config_prefix}_TTL", self.ttl)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def map_values(self, func):
+        """Replace every live value with func(key, value), keeping its expiry.
+
+        Values are swapped rather than mutated so readers holding the old
+        value are unaffected. Returning None drops the entry.
+        """
+        with self._lock:
+            now = time.monotonic()
+            for key, (expires_at, value) in list(self._data.items()):
+                new_value = func(key, value) if expires_at >= now else None
+                if new_value is None:
+                    del self._data[key]
+                else:
+                    self._data[key] = (expires_at, new_value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
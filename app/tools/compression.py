@@ -0,0 +1,198 @@
+import threading
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: br is not offered without it
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # optional: zstd is not offered without it
+    zstandard = None
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        # A sync flush so every chunk of a stream reaches the client at once.
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+STREAMS = {"gzip": _GzipStream, "br": _BrotliStream, "zstd": _ZstdStream}
+INSTALLED = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+
+
+class Compression:
+    """Compresses responses with the best encoding the client accepts.
+
+    Offered encodings come from COMPRESS_ALGORITHMS in server preference
+    order, limited to those whose library is installed; ties in the
+    client's Accept-Encoding q-values go to the earlier one. Only
+    COMPRESS_MIMETYPES bodies of at least COMPRESS_MIN_SIZE bytes are
+    compressed. Streamed bodies are compressed chunk by chunk. Partial
+    content, range-capable files (GridFS game content) and bodies that are
+    already encoded are left alone; images and archives are not in the
+    mimetype list to begin with.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.algorithms = ["br", "zstd", "gzip"]
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3}
+        self.min_size = 1024
+        self.mimetypes = {"application/json", "text/html", "text/plain"}
+        self.compressed = {}
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get("COMPRESS_ENABLED", self.enabled)
+        self.algorithms = [
+            name
+            for name in app.config.get("COMPRESS_ALGORITHMS", self.algorithms)
+            if INSTALLED.get(name)
+        ]
+        self.levels = {**self.levels, **app.config.get("COMPRESS_LEVELS", {})}
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", self.min_size)
+        self.mimetypes = set(app.config.get("COMPRESS_MIMETYPES", self.mimetypes))
+        if self.enabled:
+            app.after_request(self.compress_response)
+
+    def _negotiate(self) -> str | None:
+        accepted = request.accept_encodings
+        best, best_quality = None, 0
+        for name in self.algorithms:
+            quality = accepted.quality(name)
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def _skip(self, response) -> bool:
+        return (
+            request.method == "HEAD"
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.mimetype not in self.mimetypes
+            or "Content-Encoding" in response.headers
+            or "Content-Range" in response.headers
+            or response.accept_ranges
+        )
+
+    def compress_response(self, response):
+        if self._skip(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = self._negotiate()
+        if encoding is None or (
+            response.content_length is not None and response.content_length < self.min_size
+        ):
+            return self._count_skip(response)
+        if response.is_streamed:
+            return self._compress_stream(response, encoding)
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return self._count_skip(response)
+        stream = STREAMS[encoding](self.levels[encoding])
+        compressed = stream.compress(data) + stream.finish()
+        if len(compressed) >= len(data):
+            return self._count_skip(response)
+        response.set_data(compressed)
+        self._encoded(response, encoding)
+        self._count(encoding, len(data), len(compressed))
+        return response
+
+    def _compress_stream(self, response, encoding: str):
+        body = response.iter_encoded()
+        source = response.response
+
+        def generate():
+            stream = STREAMS[encoding](self.levels[encoding])
+            try:
+                for chunk in body:
+                    data = stream.compress(chunk) + stream.flush()
+                    self._count(None, len(chunk), len(data))
+                    if data:
+                        yield data
+                data = stream.finish()
+                self._count(encoding, 0, len(data))
+                yield data
+            finally:
+                if hasattr(source, "close"):
+                    source.close()
+
+        response.response = generate()
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
+        self._encoded(response, encoding)
+        return response
+
+    def _encoded(self, response, encoding: str):
+        response.headers["Content-Encoding"] = encoding
+        # The encoded body is a different byte sequence, so a strong
+        # validator of the identity body only stays valid as a weak one.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+    def _count(self, encoding: str | None, size: int, compressed_size: int):
+        with self._lock:
+            if encoding:
+                self.compressed[encoding] = self.compressed.get(encoding, 0) + 1
+            self.bytes_in += size
+            self.bytes_out += compressed_size
+
+    def _count_skip(self, response):
+        with self._lock:
+            self.skipped += 1
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "algorithms": self.algorithms,
+                "compressed": dict(self.compressed),
+                "skipped": self.skipped,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            }
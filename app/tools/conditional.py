@@ -0,0 +1,33 @@
+import hashlib
+from flask import request, make_response
+
+
+def weak_etag(*parts) -> str:
+    """A short validator for a response built from parts (ids, revisions, ...)."""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def not_modified(etag: str):
+    """A 304 response if the client already holds etag, else None.
+
+    Checked before the payload is serialized, so an unchanged poll costs
+    only the query that produced the validator.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = make_response("", 304)
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    return response
+
+
+def with_etag(rv, etag: str):
+    """Attach etag to a view's return value; clients must revalidate it."""
+    response = make_response(rv)
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    return response
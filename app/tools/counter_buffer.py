@@ -0,0 +1,141 @@
+import atexit
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict
+
+
+class WriteBuffer(ABC):
+    """Coalesces writes per key and hands them to writer in batches.
+
+    Every value added for a key within <config_prefix>_INTERVAL seconds is
+    merged into one, so hot documents take one write per interval. A flush
+    also starts early once <config_prefix>_MAX_KEYS keys are pending, and
+    once more at interpreter exit. While <config_prefix>_ENABLED is off,
+    add() writes through immediately.
+
+    writer receives {key: merged value} and must apply it in one batch.
+    Subclasses define merge(), which must be associative so a failed batch
+    can be merged back into the values added since.
+    """
+
+    def __init__(
+        self,
+        config_prefix: str,
+        writer: Callable[[Dict], None],
+        interval: float = 1.0,
+        max_keys: int = 1000,
+    ):
+        self.config_prefix = config_prefix
+        self.writer = writer
+        self.enabled = False
+        self.interval = interval
+        self.max_keys = max_keys
+        self.logger = logging.getLogger(__name__)
+        self.buffered = 0
+        self.flushed = 0
+        self.writes = 0
+        self.flushes = 0
+        self.failures = 0
+        self.last_flush_seconds = 0.0
+        self._pending = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get(f"{self.config_prefix}_ENABLED", self.enabled)
+        self.interval = app.config.get(f"{self.config_prefix}_INTERVAL", self.interval)
+        self.max_keys = app.config.get(f"{self.config_prefix}_MAX_KEYS", self.max_keys)
+        self.logger = app.logger
+
+    @abstractmethod
+    def merge(self, current, value):
+        pass
+
+    def add(self, key, value):
+        if not self.enabled:
+            self.writer({key: self.merge(None, value)})
+            return
+        with self._lock:
+            self._pending[key] = self.merge(self._pending.get(key), value)
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self.buffered += 1
+            full = len(self._pending) >= self.max_keys
+            if self._thread is None:
+                # Started on first use so forked workers each get their own.
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.config_prefix.lower()}-flush", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.flush)
+        if full:
+            self._wakeup.set()
+
+    def pending(self, key):
+        """The merged value for key that is not written yet, or None."""
+        with self._lock:
+            return self._pending.get(key)
+
+    def discard(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+            self._counts.pop(key, None)
+
+    def flush(self) -> int:
+        """Write everything pending now; returns the number of keys written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, counts = self._pending, self._counts
+                self._pending, self._counts = {}, {}
+            if not batch:
+                return 0
+            started_at = time.perf_counter()
+            try:
+                self.writer(batch)
+            except Exception:
+                self.failures += 1
+                self.logger.exception("%s flush of %d keys failed", self.config_prefix, len(batch))
+                with self._lock:
+                    for key, value in batch.items():
+                        self._pending[key] = self.merge(value, self._pending.get(key))
+                        self._counts[key] = self._counts.get(key, 0) + counts[key]
+                return 0
+            self.last_flush_seconds = time.perf_counter() - started_at
+            self.flushes += 1
+            self.writes += len(batch)
+            self.flushed += sum(counts.values())
+            return len(batch)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "interval": self.interval,
+                "pending_keys": len(self._pending),
+                "buffered": self.buffered,
+                "flushed": self.flushed,
+                "writes": self.writes,
+                "flushes": self.flushes,
+                "failures": self.failures,
+                "last_flush_ms": round(self.last_flush_seconds * 1000, 2),
+            }
+
+
+class CounterBuffer(WriteBuffer):
+    """Sums {field: delta} $inc documents per key."""
+
+    def merge(self, current, value):
+        merged = dict(current or {})
+        for field, delta in (value or {}).items():
+            merged[field] = merged.get(field, 0) + delta
+        return merged
@@ -0,0 +1,15 @@
+import base64
+from bson import json_util
+
+
+def encode_cursor(payload: dict) -> str:
+    raw = json_util.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json_util.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise Exception("Invalid cursor")
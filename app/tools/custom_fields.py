@@ -1,10 +1,23 @@
+from flask import url_for
 from marshmallow import fields
 from mongoengine import GridFSProxy
-import base64
 
 
-class GridFSField(fields.Field):
+class GridFSUrlField(fields.Field):
+    """Serializes a GridFS reference as the URL of the endpoint streaming it.
+
+    The file id is added as a version parameter so clients can cache the URL
+    for as long as the game keeps the same file.
+    """
+
+    def __init__(self, endpoint: str, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint
+
     def _serialize(self, value, attr, obj, **kwargs):
-        if isinstance(value, GridFSProxy) and value:
-            return base64.b64encode(value.read()).decode()
-        return None
+        grid_id = value.grid_id if isinstance(value, GridFSProxy) else value
+        if not grid_id:
+            return None
+        # Raw documents straight from pymongo keep the primary key in _id.
+        game_id = obj.get("id", obj.get("_id")) if isinstance(obj, dict) else obj.id
+        return url_for(self.endpoint, game_id=str(game_id), v=str(grid_id))
@@ -0,0 +1,37 @@
+import mimetypes
+from flask import request, Response as FlaskResponse
+from werkzeug.wsgi import wrap_file
+
+
+def send_grid_file(
+    grid_out, max_age: int, immutable: bool = False, accept_ranges: bool = False
+) -> FlaskResponse:
+    """Stream a GridFS file with caching headers.
+
+    GridFS files are never rewritten in place (a new upload gets a new _id),
+    so the file id is used as a strong ETag and If-None-Match is answered
+    with 304 without reading any chunk. The body is read one GridFS chunk at
+    a time; with accept_ranges, Range requests seek straight to the first
+    requested chunk and are answered with 206.
+    """
+    content_type = (
+        grid_out.content_type
+        or mimetypes.guess_type(grid_out.filename or "")[0]
+        or "application/octet-stream"
+    )
+    response = FlaskResponse(
+        wrap_file(request.environ, grid_out, buffer_size=grid_out.chunk_size),
+        mimetype=content_type,
+        direct_passthrough=True,
+    )
+    response.content_length = grid_out.length
+    response.set_etag(str(grid_out._id))
+    response.last_modified = grid_out.upload_date
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = immutable
+    return response.make_conditional(
+        request,
+        accept_ranges=accept_ranges,
+        complete_length=grid_out.length if accept_ranges else None,
+    )
@@ -0,0 +1,36 @@
+import hashlib
+import math
+from typing import Dict, Iterable
+
+# 2**12 registers: about 1.6% standard error. Registers are stored sparsely
+# as {"<index>": rank}, so they merge with MongoDB's $max update operator.
+PRECISION = 12
+REGISTER_COUNT = 1 << PRECISION
+
+
+def register(value: str) -> tuple[int, int]:
+    """The register a value falls into and the rank it would set there."""
+    hashed = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+    index = hashed >> (64 - PRECISION)
+    remainder = hashed & ((1 << (64 - PRECISION)) - 1)
+    return index, (64 - PRECISION) - remainder.bit_length() + 1
+
+
+def merge(sketches: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    merged = {}
+    for registers in sketches:
+        for index, rank in registers.items():
+            if rank > merged.get(index, 0):
+                merged[index] = rank
+    return merged
+
+
+def estimate(registers: Dict[str, int]) -> int:
+    """Approximate number of distinct values added to the sketch."""
+    alpha = 0.7213 / (1 + 1.079 / REGISTER_COUNT)
+    zeros = REGISTER_COUNT - len(registers)
+    harmonic = zeros + sum(2.0 ** -rank for rank in registers.values())
+    raw = alpha * REGISTER_COUNT * REGISTER_COUNT / harmonic
+    if raw <= 2.5 * REGISTER_COUNT and zeros:
+        return round(REGISTER_COUNT * math.log(REGISTER_COUNT / zeros))
+    return round(raw)
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app
+from flask_bcrypt import Bcrypt
+from werkzeug.exceptions import ServiceUnavailable
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated pool instead of the request thread.
+
+    At most <workers> hashes run at once and <queue size> more may wait;
+    anything beyond that is refused at once with a 503, so a login burst
+    cannot pin every worker or starve cheap requests of CPU. Configured in
+    init_app from PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE and
+    PASSWORD_HASH_TIMEOUT; the cost comes from Flask-Bcrypt's
+    BCRYPT_LOG_ROUNDS.
+    """
+
+    def __init__(self, bcrypt: Bcrypt, workers: int | None = None, queue_size: int = 16):
+        self.bcrypt = bcrypt
+        self.workers = workers or os.cpu_count() or 2
+        self.queue_size = queue_size
+        self.timeout = 5.0
+        self.calls = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.rehashed = 0
+        self._durations = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._executor = None
+
+    def init_app(self, app):
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS") or self.workers
+        self.queue_size = app.config.get("PASSWORD_HASH_QUEUE_SIZE", self.queue_size)
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT", self.timeout)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hash")
+
+    @property
+    def rounds(self) -> int:
+        return self.bcrypt._log_rounds
+
+    def _run(self, name, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ServiceUnavailable("Too many sign-ins at once, try again shortly", retry_after=1)
+        submitted_at = time.perf_counter()
+        timing = {}
+
+        def call():
+            timing["started_at"] = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                timing["ended_at"] = time.perf_counter()
+
+        future = self._executor.submit(call)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            result = future.result(self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise ServiceUnavailable("Sign-in is busy, try again shortly", retry_after=1)
+        queued = timing["started_at"] - submitted_at
+        hashing = timing["ended_at"] - timing["started_at"]
+        with self._lock:
+            self.calls += 1
+            self._durations.append(hashing)
+        current_app.logger.debug(
+            "bcrypt %s: %.1fms hashing, %.1fms queued", name, hashing * 1000, queued * 1000
+        )
+        return result
+
+    def hash(self, password: str) -> str:
+        return self._run(
+            "hash", self.bcrypt.generate_password_hash, password, self.rounds
+        ).decode("utf-8")
+
+    def check(self, hashed: str, password: str) -> bool:
+        return self._run("check", self.bcrypt.check_password_hash, hashed, password)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Whether hashed was made with a lower cost than is configured now."""
+        try:
+            return int(hashed.split("$")[2]) < self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def rehash(self, hashed: str, password: str) -> str | None:
+        """A fresh hash of an already verified password if its cost is stale.
+
+        Returns None when no rehash is due or the pool is saturated; the
+        upgrade is then simply retried on the next sign-in.
+        """
+        if not self.needs_rehash(hashed):
+            return None
+        try:
+            upgraded = self.hash(password)
+        except ServiceUnavailable:
+            return None
+        with self._lock:
+            self.rehashed += 1
+        return upgraded
+
+    def stats(self) -> dict:
+        with self._lock:
+            durations = sorted(self._durations)
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "rounds": self.rounds,
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "rehashed": self.rehashed,
+                "p50_ms": round(durations[len(durations) // 2] * 1000, 1) if durations else 0,
+                "max_ms": round(durations[-1] * 1000, 1) if durations else 0,
+            }
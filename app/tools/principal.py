@@ -0,0 +1,35 @@
+from bson import ObjectId
+from flask_jwt_extended import get_jwt
+from app.models.user import UserRole
+
+
+class Principal:
+    """The signed-in user as described by the access token's claims.
+
+    It has the attributes services read from a User (id, name, nickname,
+    email, roles), so either can be passed where an acting user is
+    expected. The token was already checked against the user's current
+    token_version, so its claims are as fresh as a database read.
+    """
+
+    def __init__(self, id, name: str, nickname: str, email: str, roles: list):
+        self.id = ObjectId(id)
+        self.name = name
+        self.nickname = nickname
+        self.email = email
+        self.roles = roles
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "Principal":
+        return cls(
+            claims["sub"],
+            claims.get("name"),
+            claims.get("nickname"),
+            claims.get("email"),
+            [UserRole(role) for role in claims.get("roles", [])],
+        )
+
+
+def current_principal() -> Principal:
+    """The principal of the current request; call inside jwt_required views."""
+    return Principal.from_claims(get_jwt())
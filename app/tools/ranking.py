@@ -0,0 +1,78 @@
+from datetime import datetime
+
+# Rankings are computed by MongoDB in a pipeline update, so they are always
+# derived from the counters as stored and never from a stale copy in memory.
+
+HOT_EPOCH = datetime(2024, 1, 1)
+HOT_DECAY_SECONDS = 45000
+PLAY_WEIGHT = 0.1
+WILSON_Z = 1.96
+
+
+def wilson_score_expression(z: float = WILSON_Z) -> dict:
+    """Lower bound of the Wilson score interval of the upvote ratio.
+
+    Ranks a game by how confident we are it is liked, so 90 up / 10 down
+    beats 1 up / 0 down.
+    """
+    n = {"$add": ["$upvote", "$downvote"]}
+    p = {"$divide": ["$upvote", n]}
+    z2 = z * z
+    return {
+        "$cond": [
+            {"$eq": [n, 0]},
+            0.0,
+            {
+                "$divide": [
+                    {
+                        "$subtract": [
+                            {"$add": [p, {"$divide": [z2 / 2, n]}]},
+                            {
+                                "$multiply": [
+                                    z,
+                                    {
+                                        "$sqrt": {
+                                            "$divide": [
+                                                {
+                                                    "$add": [
+                                                        {"$multiply": [p, {"$subtract": [1, p]}]},
+                                                        {"$divide": [z2 / 4, n]},
+                                                    ]
+                                                },
+                                                n,
+                                            ]
+                                        }
+                                    },
+                                ]
+                            },
+                        ]
+                    },
+                    {"$add": [1, {"$divide": [z2, n]}]},
+                ]
+            },
+        ],
+    }
+
+
+def hot_score_expression() -> dict:
+    """Log-scaled net votes and plays, offset by the game's age.
+
+    Every HOT_DECAY_SECONDS of recency is worth ten times the engagement, so
+    newer games overtake older ones without rescoring anything as time
+    passes; the score only changes when the counters do.
+    """
+    engagement = {
+        "$add": [
+            {"$subtract": ["$upvote", "$downvote"]},
+            {"$multiply": [PLAY_WEIGHT, "$played_count"]},
+        ]
+    }
+    sign = {"$cond": [{"$gt": [engagement, 0]}, 1, {"$cond": [{"$lt": [engagement, 0]}, -1, 0]}]}
+    order = {"$log10": {"$max": [{"$abs": engagement}, 1]}}
+    age = {
+        "$divide": [
+            {"$subtract": ["$created_at", HOT_EPOCH]},
+            HOT_DECAY_SECONDS * 1000,
+        ]
+    }
+    return {"$add": [{"$multiply": [sign, order]}, age]}
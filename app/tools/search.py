@@ -0,0 +1,31 @@
+import re
+from typing import Iterable, List
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 20
+
+
+def tokenize(text: str | None) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def search_prefixes(texts: Iterable[str | None]) -> List[str]:
+    """Every leading substring of every word, for indexed prefix matching."""
+    prefixes = set()
+    for text in texts:
+        for token in tokenize(text):
+            for length in range(MIN_PREFIX_LENGTH, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                prefixes.add(token[:length])
+    return sorted(prefixes)
+
+
+def query_prefixes(query: str) -> List[str]:
+    """The prefix terms a query must all match; short words are dropped."""
+    return sorted(
+        {
+            token[:MAX_PREFIX_LENGTH]
+            for token in tokenize(query)
+            if len(token) >= MIN_PREFIX_LENGTH
+        }
+    )
@@ -0,0 +1,97 @@
+from functools import lru_cache
+from typing import Callable, Type
+from marshmallow import Schema, fields, missing
+
+# Field types whose dump is a plain conversion of the value. Subclasses are
+# not included on purpose: they may override _serialize.
+CONVERTERS = {
+    fields.String: str,
+    fields.Email: str,
+    fields.Integer: int,
+    fields.Float: float,
+    fields.Number: float,
+}
+DUMP_HOOKS = ("pre_dump", "post_dump")
+
+
+def _get(obj, key):
+    if isinstance(obj, dict):
+        value = obj.get(key, missing)
+        # Raw documents straight from pymongo keep the primary key in _id.
+        if value is missing and key == "id":
+            value = obj.get("_id", missing)
+        return value
+    return getattr(obj, key, missing)
+
+
+def _compile_value(field: fields.Field) -> Callable | None:
+    """A value -> dumped value function for field, or None if it has none."""
+    if getattr(field, "as_string", False):
+        return None
+    convert = CONVERTERS.get(type(field))
+    if convert:
+        return convert
+    if type(field) is fields.DateTime and field.format in (None, "iso"):
+        return lambda value: value.isoformat()
+    if type(field) is fields.List:
+        inner = _compile_value(field.inner)
+        if inner is None:
+            return None
+        return lambda value: [None if each is None else inner(each) for each in value]
+    if type(field) is fields.Nested:
+        many = field.many
+        compiled = []
+
+        def dump_nested(value):
+            # Compiled on first use so schemas that nest themselves terminate.
+            if not compiled:
+                compiled.append(compile_instance(field.schema))
+            dump = compiled[0]
+            if many or field.schema.many:
+                return [dump(each) for each in value]
+            return dump(value)
+
+        return dump_nested
+    return None
+
+
+def compile_instance(schema: Schema) -> Callable:
+    """Build a dump function equivalent to schema.dump for a single object.
+
+    Each field is resolved to its attribute, output key and converter once,
+    so dumping is a loop of attribute reads and conversions. Fields with no
+    plain conversion (custom fields, dump defaults, dotted attributes) fall
+    back to their own serialize, and schemas with dump hooks to schema.dump.
+    Objects may be documents or raw BSON dicts.
+    """
+    if any(schema._hooks.get(hook) for hook in DUMP_HOOKS):
+        return schema.dump
+    plan = []
+    for name, field in schema.dump_fields.items():
+        attribute = field.attribute or name
+        convert = _compile_value(field)
+        if field.dump_default is not missing or "." in attribute:
+            convert = None
+        plan.append((field.data_key or name, attribute, field, convert))
+
+    def dump(obj):
+        data = {}
+        for key, attribute, field, convert in plan:
+            if convert is None:
+                value = field.serialize(attribute, obj, accessor=schema.get_attribute)
+                if value is not missing:
+                    data[key] = value
+                continue
+            value = _get(obj, attribute)
+            if value is missing:
+                continue
+            data[key] = None if value is None else convert(value)
+        return data
+
+    return dump
+
+
+@lru_cache(maxsize=None)
+def serializer(schema_cls: Type[Schema]) -> Callable:
+    """The compiled dump function for a DTO class, built once per process."""
+    return compile_instance(schema_cls())
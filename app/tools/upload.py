@@ -0,0 +1,115 @@
+import time
+from typing import Dict, Tuple
+from flask import request, current_app
+from mongoengine import FileField, GridFSProxy
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import (
+    MultipartDecoder,
+    Field,
+    File,
+    Data,
+    Epilogue,
+    NeedData,
+)
+
+
+def stream_upload(
+    file_fields: Dict[str, FileField],
+    limits: Dict[str, int],
+    chunk_size: int = 256 * 1024,
+    max_form_memory_size: int = 500 * 1024,
+) -> Tuple[MultiDict, Dict[str, GridFSProxy]]:
+    """Parse a multipart request, writing file parts straight into GridFS.
+
+    Unlike request.files, nothing is buffered in memory or spooled to disk:
+    each chunk read from the socket is decoded and appended to the GridFS file
+    of its FileField, and a part is rejected with 413 as soon as it crosses
+    its limit. File parts not listed in file_fields are discarded. If parsing
+    fails, the files written so far are deleted.
+    """
+    mimetype, options = parse_options_header(request.headers.get("Content-Type", ""))
+    boundary = options.get("boundary")
+    if mimetype != "multipart/form-data" or not boundary:
+        raise BadRequest("Expected a multipart/form-data body")
+
+    decoder = MultipartDecoder(boundary.encode("latin-1"), max_form_memory_size)
+    form = MultiDict()
+    files: Dict[str, GridFSProxy] = {}
+    stats: Dict[str, Tuple[int, float]] = {}
+    current = None
+    container = []
+    part_size = 0
+    started_at = time.perf_counter()
+    try:
+        while True:
+            chunk = request.stream.read(chunk_size)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, Field):
+                    current, container, part_size = event, [], 0
+                elif isinstance(event, File):
+                    current, part_size = event, 0
+                    if event.name in file_fields and event.filename:
+                        container = file_fields[event.name].get_proxy_obj(
+                            key=event.name, instance=None
+                        )
+                        container.new_file(
+                            filename=event.filename,
+                            content_type=event.headers.get("Content-Type"),
+                        )
+                        files[event.name] = container
+                        started_at = time.perf_counter()
+                    else:
+                        container = None
+                elif isinstance(event, Data):
+                    part_size += len(event.data)
+                    if isinstance(current, Field):
+                        if part_size > max_form_memory_size:
+                            raise RequestEntityTooLarge(f"{current.name} is too large")
+                        container.append(event.data)
+                    elif container is not None:
+                        limit = limits.get(current.name)
+                        if limit is not None and part_size > limit:
+                            raise RequestEntityTooLarge(
+                                f"{current.name} exceeds {limit} bytes"
+                            )
+                        container.write(event.data)
+                    if not event.more_data:
+                        if isinstance(current, Field):
+                            form.add(current.name, b"".join(container).decode("utf-8", "replace"))
+                        elif container is not None:
+                            container.close()
+                            stats[current.name] = (part_size, time.perf_counter() - started_at)
+                event = decoder.next_event()
+            if not chunk:
+                break
+    except ValueError as e:
+        discard_uploads(files)
+        raise BadRequest(str(e))
+    except Exception:
+        discard_uploads(files)
+        raise
+
+    for name, (size, elapsed) in stats.items():
+        current_app.logger.info(
+            "Uploaded %s: %d bytes in %.2fs (%.2f MB/s)",
+            name,
+            size,
+            elapsed,
+            size / max(elapsed, 1e-6) / (1024 * 1024),
+        )
+    return form, files
+
+
+def discard_uploads(files: Dict[str, GridFSProxy]):
+    for proxy in files.values():
+        try:
+            if proxy.newfile and not proxy.newfile.closed:
+                proxy.newfile.abort()
+            else:
+                proxy.delete()
+        except Exception:
+            current_app.logger.exception("Could not remove uploaded file %s", proxy.grid_id)
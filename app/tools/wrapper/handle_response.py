@@ -1,3 +1,4 @@
+from werkzeug.exceptions import HTTPException
 from app.tools.response import Response
 
 
@@ -9,6 +10,9 @@ def handle_response(func):
                 return res
             else:
                 return Response.success(response=res)
+        except HTTPException:
+            # Back-pressure such as a 503 from the password pool keeps its status.
+            raise
         except Exception as e:
             return Response.fail(str(e))
 
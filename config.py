@@ -13,6 +13,62 @@ class Config:
     JWT_SECRET_KEY = os.getenv("SECRET_KEY")
     JWT_TOKEN_LOCATION = ["headers"]
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=5)
+    THUMBNAIL_MAX_AGE = int(os.getenv("THUMBNAIL_MAX_AGE", 60 * 60 * 24 * 30))
+    GAME_CONTENT_MAX_AGE = int(os.getenv("GAME_CONTENT_MAX_AGE", 60 * 60 * 24))
+    UPLOAD_LIMITS = {
+        "thumbnail": int(os.getenv("UPLOAD_MAX_THUMBNAIL_SIZE", 5 * 1024 * 1024)),
+        "game_content": int(os.getenv("UPLOAD_MAX_GAME_CONTENT_SIZE", 500 * 1024 * 1024)),
+    }
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 256 * 1024))
+    MAX_CONTENT_LENGTH = sum(UPLOAD_LIMITS.values()) + 1024 * 1024
+    GAME_COUNT_CACHE_TTL = int(os.getenv("GAME_COUNT_CACHE_TTL", 30))
+    GAME_COUNT_CACHE_MAXSIZE = int(os.getenv("GAME_COUNT_CACHE_MAXSIZE", 1024))
+    GAME_COUNT_ESTIMATED = os.getenv("GAME_COUNT_ESTIMATED", "false").lower() == "true"
+    GAME_FACET_CACHE_TTL = int(os.getenv("GAME_FACET_CACHE_TTL", 300))
+    GAME_FACET_CACHE_MAXSIZE = int(os.getenv("GAME_FACET_CACHE_MAXSIZE", 256))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+    USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", 4096))
+    TOKEN_VERSION_CACHE_TTL = int(os.getenv("TOKEN_VERSION_CACHE_TTL", 30))
+    TOKEN_VERSION_CACHE_MAXSIZE = int(os.getenv("TOKEN_VERSION_CACHE_MAXSIZE", 10000))
+    GAME_COUNTER_BUFFER_ENABLED = (
+        os.getenv("GAME_COUNTER_BUFFER_ENABLED", "false").lower() == "true"
+    )
+    GAME_COUNTER_BUFFER_INTERVAL = float(os.getenv("GAME_COUNTER_BUFFER_INTERVAL", 1.0))
+    GAME_COUNTER_BUFFER_MAX_KEYS = int(os.getenv("GAME_COUNTER_BUFFER_MAX_KEYS", 1000))
+    PLAY_BUFFER_ENABLED = os.getenv("PLAY_BUFFER_ENABLED", "false").lower() == "true"
+    PLAY_BUFFER_INTERVAL = float(os.getenv("PLAY_BUFFER_INTERVAL", 5.0))
+    PLAY_BUFFER_MAX_KEYS = int(os.getenv("PLAY_BUFFER_MAX_KEYS", 5000))
+    PLAY_SESSION_MAX_DURATION = int(os.getenv("PLAY_SESSION_MAX_DURATION", 60 * 60 * 12))
+    SCORE_BATCH_MAX_SIZE = int(os.getenv("SCORE_BATCH_MAX_SIZE", 1000))
+    # Leaderboard ranks add up entry counts kept per bucket at widths
+    # 1, BASE, BASE**2, ... BASE**(LEVELS - 1); scores above the widest level
+    # still rank correctly, just with more top-level buckets to add up.
+    # Run `flask games rebuild-score-buckets` after changing either.
+    SCORE_BUCKET_BASE = int(os.getenv("SCORE_BUCKET_BASE", 32))
+    SCORE_BUCKET_LEVELS = int(os.getenv("SCORE_BUCKET_LEVELS", 6))
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    # Server preference order; br and zstd are skipped unless brotli or
+    # zstandard is installed.
+    COMPRESS_ALGORITHMS = os.getenv("COMPRESS_ALGORITHMS", "br,zstd,gzip").split(",")
+    COMPRESS_LEVELS = {
+        "gzip": int(os.getenv("COMPRESS_GZIP_LEVEL", 6)),
+        "br": int(os.getenv("COMPRESS_BR_LEVEL", 4)),
+        "zstd": int(os.getenv("COMPRESS_ZSTD_LEVEL", 3)),
+    }
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_MIMETYPES = [
+        "application/json",
+        "application/javascript",
+        "text/css",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+        "image/svg+xml",
+    ]
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 16))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 5.0))
     MONGODB_SETTINGS = {
         "db": os.getenv("MONGO_DB", ""),
         "host": os.getenv("MONGO_HOST", ""),
@@ -0,0 +1,55 @@
+import os
+import threading
+import mongomock
+import pytest
+from config import TestingConfig
+from app import create_app
+from app.models.game import Game
+from app.models.game_vote import GameVote
+from app.models.user import User
+from app.repositories.base_repository import BaseRepository
+
+# A replica set, such as a local single-node one, runs the tests against
+# real transactions; without it they run on mongomock.
+MONGODB_TEST_URI = os.getenv("MONGODB_TEST_URI")
+
+
+class Config(TestingConfig):
+    SECRET_KEY = "test-secret-key-for-signing-tokens"
+    JWT_SECRET_KEY = SECRET_KEY
+    MONGODB_SETTINGS = (
+        {"db": "megame_test", "host": MONGODB_TEST_URI}
+        if MONGODB_TEST_URI
+        else {"db": "megame_test", "host": "mongodb://localhost", "mongo_client_class": mongomock.MongoClient}
+    )
+
+
+@pytest.fixture(scope="session")
+def app():
+    return create_app(Config)
+
+
+@pytest.fixture(autouse=True)
+def app_context(app):
+    with app.app_context():
+        yield
+        for model in (Game, GameVote, User):
+            model.objects.delete()
+
+
+@pytest.fixture(autouse=True)
+def serial_transactions(monkeypatch):
+    """Stand in for transactions on mongomock, which has no sessions.
+
+    Running each callback alone is the outcome transactions guarantee for
+    the writes inside them; only the rollback on error is not reproduced.
+    """
+    if MONGODB_TEST_URI:
+        return
+    lock = threading.Lock()
+
+    def run_in_transaction(self, callback):
+        with lock:
+            return callback(None)
+
+    monkeypatch.setattr(BaseRepository, "run_in_transaction", run_in_transaction)
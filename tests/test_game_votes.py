@@ -0,0 +1,87 @@
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from bson import ObjectId
+from app.models.game import Game
+from app.models.game_vote import GameVote, VoteDirection
+from app.models.user import User
+from app.repositories.comment_repository import CommentRepository
+from app.repositories.game_repository import GameRepository
+from app.repositories.game_vote_repository import GameVoteRepository
+from app.repositories.play_repository import PlayRepository
+from app.repositories.score_repository import ScoreRepository
+from app.repositories.user_repository import UserRepository
+from app.services.game_service import GameService
+
+
+@pytest.fixture
+def game_service():
+    return GameService(
+        GameRepository(),
+        UserRepository(),
+        GameVoteRepository(),
+        CommentRepository(),
+        ScoreRepository(),
+        PlayRepository(),
+    )
+
+
+@pytest.fixture
+def voters():
+    return [
+        User(email=f"voter{index}@example.com", nickname=f"voter{index}", password="-").save()
+        for index in range(10)
+    ]
+
+
+@pytest.fixture
+def game(voters):
+    return Game(publisher_id=voters[0].id, game_engine="Unity", title="Votes").save()
+
+
+def counters(game_id):
+    game = Game.objects.get(id=game_id)
+    return game.upvote, game.downvote
+
+
+def test_vote_casts_switches_and_withdraws(game_service, game, voters):
+    voter = voters[0]
+
+    res = game_service.upvote_game(game.id, voter)
+    assert res.result
+    assert (res.response["upvote"], res.response["downvote"], res.response["vote"]) == (1, 0, "up")
+
+    res = game_service.downvote_game(game.id, voter)
+    assert (res.response["upvote"], res.response["downvote"], res.response["vote"]) == (0, 1, "down")
+
+    res = game_service.downvote_game(game.id, voter)
+    assert (res.response["upvote"], res.response["downvote"], res.response["vote"]) == (0, 0, None)
+    assert GameVote.objects(game_id=game.id).count() == 0
+
+
+def test_concurrent_votes_keep_counters_exact(game_service, game, voters):
+    def click(_):
+        vote = random.choice((game_service.upvote_game, game_service.downvote_game))
+        return vote(game.id, random.choice(voters)).result
+
+    with ThreadPoolExecutor(8) as executor:
+        assert all(executor.map(click, range(400)))
+
+    ups = GameVote.objects(game_id=game.id, direction=VoteDirection.UP).count()
+    downs = GameVote.objects(game_id=game.id, direction=VoteDirection.DOWN).count()
+    assert counters(game.id) == (ups, downs)
+    assert ups + downs <= len(voters)
+
+
+def test_vote_on_missing_game_fails(game_service, voters):
+    res = game_service.upvote_game(ObjectId(), voters[0])
+    assert not res.result
+    assert res.message == "Game not found"
+
+
+@pytest.mark.skipif(not os.getenv("MONGODB_TEST_URI"), reason="needs a replica set for transactions")
+def test_vote_on_missing_game_keeps_no_vote_record(game_service, voters):
+    game_id = ObjectId()
+    game_service.upvote_game(game_id, voters[0])
+    assert GameVote.objects(game_id=game_id).count() == 0